@@ -0,0 +1,17 @@
+"""
+Import path setup for FloatChat scripts
+Puts the project root (home of gemini_sql_generator, vector_db_manager, ...) on sys.path once
+"""
+
+import sys
+from pathlib import Path
+
+# Computed once at import time
+ROOT = str(Path(__file__).resolve().parents[1])
+MCP_DIR = str(Path(__file__).resolve().parent)
+
+
+def ensure_on_syspath() -> None:
+    """Prepend the project root to sys.path unless it is already there"""
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
@@ -0,0 +1,21 @@
+"""
+Shared FloatChat tool instances
+One orchestrator and one cache manager per process, created on first use
+"""
+
+import functools
+
+from float_chat_mcp.data_access_tools.data_access_orchestrator import DataAccessOrchestrator
+from float_chat_mcp.data_access_tools.redis_cache_manager import RedisCacheManager
+
+
+@functools.lru_cache(maxsize=1)
+def get_orchestrator() -> DataAccessOrchestrator:
+    """Process-wide orchestrator (Gemini + cached DB access), built on the first call"""
+    return DataAccessOrchestrator(use_gemini=True, enable_cache=True)
+
+
+@functools.lru_cache(maxsize=1)
+def get_cache_manager() -> RedisCacheManager:
+    """Process-wide query result cache, built on the first call"""
+    return RedisCacheManager(enabled=True)
@@ -1,74 +1,255 @@
 from fastmcp import FastMCP
+from concurrent.futures import ProcessPoolExecutor
+import os
+import threading
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Any,Optional
-import matplotlib.pyplot as plt
+from typing import Dict, List, Any,Optional, Tuple
+import base64
+from functools import lru_cache
+from io import BytesIO
 import matplotlib.dates as mdates
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.ticker import MaxNLocator
+from scipy.interpolate import UnivariateSpline
 
 # Create the MCP server instance
 mcp = FastMCP("analysis_tools")
 
-# Import all tools after mcp instance is created to avoid circular imports
-# The @mcp.tool decorators will register them automatically
+# Comparisons with at least this many datasets are processed in a process pool
+PARALLEL_COMPARISON_MIN_DATASETS = 4
 
 
-@mcp.tool
-def argo_temp_trend(data: List[Dict[str, Any]], show_plot: bool = False, window: int = 20) -> Dict[str, List]:
-    """
-    Analyze temperature trends from ARGO data.
-    
-    Args:
-        data: List of dictionaries with 'datetime' and 'temperature' keys
-        show_plot: Whether to display a plot (default: False)
-        window: Rolling window size for smoothing (default: 20)
-    
-    Returns:
-        Dictionary with profiles containing measurements (datetime and temperature)
-    """
+def _new_figure(figsize):
+    """Create an Agg-backed figure via the OO API (no pyplot global state, safe in worker threads)."""
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig, fig.add_subplot()
+
+
+_ts_figures = threading.local()
+
+
+def _ts_figure():
+    """Reusable T-S (fig, ax) for the calling thread, cleared instead of rebuilt on every plot."""
+    cached = getattr(_ts_figures, "fig_ax", None)
+    if cached is None:
+        cached = _ts_figures.fig_ax = _new_figure(figsize=(10, 8))
+    else:
+        cached[1].cla()
+    return cached
+
+
+def _render_png(fig: Figure) -> str:
+    """Render a figure to a base64-encoded PNG string."""
+    fig.tight_layout()
+    buf = BytesIO()
+    fig.savefig(buf, format="png")
+    return base64.b64encode(buf.getvalue()).decode("ascii")
+
+
+@lru_cache(maxsize=64)
+def _ts_spline(sal_bytes: bytes, temp_bytes: bytes) -> UnivariateSpline:
+    """Fit (and cache) the T-S smoothing spline for a given unique-salinity profile."""
+    sal_unique = np.frombuffer(sal_bytes)
+    temp_unique = np.frombuffer(temp_bytes)
+    smoothing_factor = len(sal_unique) * 0.01
+    return UnivariateSpline(sal_unique, temp_unique, s=smoothing_factor, k=3)
+
+
+def _ts_unique_points(df_clean: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """Sorted unique salinities with the mean temperature at each (float64, as the spline fits expect)."""
+    sal = df_clean['salinity'].to_numpy(dtype=np.float64)
+    temp = df_clean['temperature'].to_numpy(dtype=np.float64)
+    sal_unique, inv = np.unique(sal, return_inverse=True)
+    temp_unique = np.bincount(inv, weights=temp) / np.bincount(inv)
+    return sal_unique, temp_unique
+
+
+def _summary_stats(values: pd.Series) -> Dict[str, Any]:
+    """count/mean/median/std_dev/min/max of a NaN-free series (shared by the stats and comparison tools)."""
+    return {
+        "count": int(len(values)),
+        "mean": float(np.mean(values)),
+        "median": float(np.median(values)),
+        "std_dev": float(np.std(values)),
+        "min": float(np.min(values)),
+        "max": float(np.max(values)),
+    }
+
+
+def _trend(
+    data: List[Dict[str, Any]],
+    value_col: str,
+    show_plot: bool,
+    window: int,
+    color: str,
+    name: str,
+    unit: str
+) -> Dict[str, Any]:
+    """Shared kernel for the time-series trend tools: rolling-mean smoothing of `value_col` over datetime."""
     # Convert to DataFrame
     df = pd.DataFrame(data)
     
-    if 'datetime' not in df.columns or 'temperature' not in df.columns:
-        raise ValueError("Required columns: 'datetime', 'temperature'")
+    if 'datetime' not in df.columns or value_col not in df.columns:
+        raise ValueError(f"Required columns: 'datetime', '{value_col}'")
 
-    # Create time-series with datetime index
-    df_clean = df[['datetime', 'temperature']].dropna().copy()
+    # Create time-series sorted by datetime
+    df_clean = df[['datetime', value_col]].dropna().copy()
     df_clean['datetime'] = pd.to_datetime(df_clean['datetime'])
-    df_clean = df_clean.sort_values('datetime').set_index('datetime')
+    df_clean = df_clean.sort_values('datetime')
     
     # Calculate rolling average for smoothing
-    df_clean['temp_smooth'] = df_clean['temperature'].rolling(window=window, center=True, min_periods=1).mean()
-    df_clean = df_clean.reset_index()
+    smooth = df_clean[value_col].rolling(window=window, center=True, min_periods=1).mean()
     
     # Create measurements list
-    measurements = []
-    for _, row in df_clean.iterrows():
-        measurements.append({
-            "datetime": row['datetime'].isoformat(),
-            "temperature": float(row['temp_smooth'])
-        })
+    measurements = [
+        {"datetime": dt.isoformat(), value_col: value}
+        for dt, value in zip(df_clean['datetime'], smooth.to_numpy(dtype=np.float64).tolist())
+    ]
+
+    result = {
+        "profiles": [{
+            "profileId": 1,
+            "measurements": measurements
+        }]
+    }
 
     if show_plot:
-        fig, ax = plt.subplots(figsize=(12, 6))
-        ax.plot(df_clean['datetime'], df_clean['temp_smooth'], color='red', linewidth=2.5, label='Temperature Trend')
+        fig, ax = _new_figure(figsize=(12, 6))
+        ax.plot(df_clean['datetime'], smooth, color=color, linewidth=2.5, label=f'{name} Trend')
         ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d %H:%M'))
         ax.xaxis.set_major_locator(mdates.AutoDateLocator(maxticks=10))
-        plt.xticks(rotation=45, ha='right')
-        ax.yaxis.set_major_locator(plt.MaxNLocator(10))
+        fig.autofmt_xdate(rotation=45, ha='right')
+        ax.yaxis.set_major_locator(MaxNLocator(10))
         ax.tick_params(axis='both', which='major', labelsize=10)
         ax.set_xlabel('Date', fontsize=11, fontweight='bold')
-        ax.set_ylabel('Temperature (°C)', fontsize=11, fontweight='bold')
-        ax.set_title('Temperature Time Series', fontsize=13, fontweight='bold')
+        ax.set_ylabel(f'{name} ({unit})', fontsize=11, fontweight='bold')
+        ax.set_title(f'{name} Time Series', fontsize=13, fontweight='bold')
         ax.grid(True, alpha=0.3, linestyle='--')
         ax.legend(loc='best')
-        plt.tight_layout()
-        plt.show()
+        result["plot_png"] = _render_png(fig)
+
+    return result
+
 
+def prepare_ts_curve_frame(data) -> pd.DataFrame:
+    """Clean T-S input into a ['temperature', 'salinity'] frame sorted by salinity."""
+    # Convert to DataFrame if needed
+    if isinstance(data, pd.DataFrame):
+        df = data
+    else:
+        df = pd.DataFrame(data)
+    
+    # Get temperature and salinity columns
+    temp_col = 'temperature' if 'temperature' in df.columns else 'TEMP'
+    sal_col = 'salinity' if 'salinity' in df.columns else 'SAL'
+    
+    # Clean data - remove NaN values
+    # (dropna/rename already return new frames, so no extra .copy() is needed)
+    df_clean = df[[temp_col, sal_col]].dropna()
+    df_clean = df_clean.rename(columns={temp_col: 'temperature', sal_col: 'salinity'})
+    
+    # Sort by salinity
+    df_clean = df_clean.sort_values('salinity')
+    
+    return df_clean
+
+
+def prepare_td_curve_frame(data) -> pd.DataFrame:
+    """Clean T-D input into a frame with level, temperature, pressure and depth, sorted by depth."""
+    # Convert to DataFrame
+    df = pd.DataFrame(data)
+    
+    # Get temperature and level columns
+    temp_col = 'temperature' if 'temperature' in df.columns else 'TEMP'
+    level_col = 'level' if 'level' in df.columns else 'LEVEL'
+    
+    if temp_col not in df.columns or level_col not in df.columns:
+        raise ValueError(f"Required columns: '{temp_col}' and '{level_col}'")
+    
+    # Clean data - remove NaN values
+    df_clean = df[[level_col, temp_col]].dropna()
+    df_clean = df_clean.rename(columns={level_col: 'level', temp_col: 'temperature'})
+    
+    # Convert level to pressure (dbar)
+    pressure_levels = [5, 10, 20, 30, 50, 75, 100, 125, 150, 200, 250, 300, 400, 500, 
+                      600, 700, 800, 900, 1000, 1100, 1200, 1300, 1400, 1500, 1750, 2000]
+    
+    def level_to_pressure(level):
+        level_int = int(level)
+        if level_int < len(pressure_levels):
+            return pressure_levels[level_int]
+        else:
+            return pressure_levels[-1] + (level_int - len(pressure_levels) + 1) * 250
+    
+    df_clean['pressure'] = df_clean['level'].apply(level_to_pressure)
+    
+    # Convert pressure to depth using hydrostatic equation
+    rho = 1025  # kg/m³ (Indian Ocean seawater density)
+    g = 9.81    # m/s²
+    df_clean['depth'] = df_clean['pressure'] * 10000 / (rho * g)
+    
+    # Sort by depth
+    df_clean = df_clean.sort_values('depth')
+    
+    return df_clean
+
+
+# Import all tools after mcp instance is created to avoid circular imports
+# The @mcp.tool decorators will register them automatically
+
+
+@mcp.tool
+def argo_temp_trend(data: List[Dict[str, Any]], show_plot: bool = False, window: int = 20) -> Dict[str, List]:
+    """
+    Analyze temperature trends from ARGO data.
+    
+    Args:
+        data: List of dictionaries with 'datetime' and 'temperature' keys
+        show_plot: Whether to render a plot, returned as base64 PNG under 'plot_png' (default: False)
+        window: Rolling window size for smoothing (default: 20)
+    
+    Returns:
+        Dictionary with profiles containing measurements (datetime and temperature)
+    """
+    return _trend(data, 'temperature', show_plot, window, color='red', name='Temperature', unit='°C')
+def _build_comparison_profile(
+    idx: int,
+    dataset: List[Dict[str, Any]],
+    label: str,
+    variable: str,
+    axis_var: Optional[str] = None
+) -> Dict[str, Any]:
+    """Build the stats + curve profile for one dataset (module-level so it pickles for worker processes)."""
+    df = pd.DataFrame(dataset)
+    
+    if variable not in df.columns:
+        raise ValueError(f"'{variable}' not found in dataset '{label}'.")
+
+    values = df[variable].dropna()
+    
+    # Create measurements for this profile
+    measurements = [{
+        "label": label,
+        "variable": variable,
+        **_summary_stats(values),
+    }]
+    
+    # Add curve data if axis_var is provided
+    if axis_var and axis_var in df.columns:
+        curve_df = df[[axis_var, variable]].dropna().sort_values(axis_var)
+        curve = np.column_stack([
+            curve_df[axis_var].to_numpy(dtype=np.float64),
+            curve_df[variable].to_numpy(dtype=np.float64)
+        ]).tolist()
+        measurements.extend({axis_var: a, variable: v} for a, v in curve)
+    
     return {
-        "profiles": [{
-            "profileId": 1,
-            "measurements": measurements
-        }]
+        "profileId": idx + 1,
+        "label": label,
+        "measurements": measurements
     }
 @mcp.tool
 def argo_comparison_tool(
@@ -81,7 +262,7 @@ def argo_comparison_tool(
     Compare statistical summaries and curve data for multiple ARGO datasets.
 
     Args:
-        datasets: List of datasets (each dataset is a list of dictionaries).
+        datasets: List of datasets (each dataset is a list of dictionaries or a DataFrame).
         labels: List of dataset labels (same length as datasets).
         variable: The variable to compare ('temperature', 'salinity', or 'pressure').
         axis_var: Optional column to use for plotting curves (e.g., 'depth' or 'datetime').
@@ -93,43 +274,24 @@ def argo_comparison_tool(
     if len(datasets) != len(labels):
         raise ValueError("The number of datasets and labels must be equal.")
 
-    # Create profiles list
-    profiles = []
-    
-    for idx, (dataset, label) in enumerate(zip(datasets, labels)):
-        df = pd.DataFrame(dataset)
-        
-        if variable not in df.columns:
-            raise ValueError(f"'{variable}' not found in dataset '{label}'.")
-
-        values = df[variable].dropna()
-        
-        # Create measurements for this profile
-        measurements = [{
-            "label": label,
-            "variable": variable,
-            "count": int(len(values)),
-            "mean": float(np.mean(values)),
-            "median": float(np.median(values)),
-            "std_dev": float(np.std(values)),
-            "min": float(np.min(values)),
-            "max": float(np.max(values)),
-        }]
-        
-        # Add curve data if axis_var is provided
-        if axis_var and axis_var in df.columns:
-            curve_df = df[[axis_var, variable]].dropna().sort_values(axis_var)
-            for _, row in curve_df.iterrows():
-                measurements.append({
-                    axis_var: float(row[axis_var]),
-                    variable: float(row[variable])
-                })
-        
-        profiles.append({
-            "profileId": idx + 1,
-            "label": label,
-            "measurements": measurements
-        })
+    n = len(datasets)
+    indices = range(n)
+    
+    # Each dataset is independent; fan out to worker processes only when there are
+    # enough of them to amortise the pickling/startup cost
+    if n >= PARALLEL_COMPARISON_MIN_DATASETS:
+        workers = min(n, os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            profiles = list(pool.map(
+                _build_comparison_profile,
+                indices, datasets, labels, [variable] * n, [axis_var] * n,
+                chunksize=max(1, n // workers)
+            ))
+    else:
+        profiles = [
+            _build_comparison_profile(idx, dataset, label, variable, axis_var)
+            for idx, dataset, label in zip(indices, datasets, labels)
+        ]
 
     return {"profiles": profiles}
 @mcp.tool
@@ -139,57 +301,13 @@ def argo_salinity_trend(data: List[Dict[str, Any]], show_plot: bool = False, win
     
     Args:
         data: List of dictionaries with 'datetime' and 'salinity' keys
-        show_plot: Whether to display a plot (default: False)
+        show_plot: Whether to render a plot, returned as base64 PNG under 'plot_png' (default: False)
         window: Rolling window size for smoothing (default: 20)
     
     Returns:
         Dictionary with profiles containing measurements (datetime and salinity)
     """
-    # Convert to DataFrame
-    df = pd.DataFrame(data)
-    
-    if 'datetime' not in df.columns or 'salinity' not in df.columns:
-        raise ValueError("Required columns: 'datetime', 'salinity'")
-
-    # Create time-series with datetime index
-    df_clean = df[['datetime', 'salinity']].dropna().copy()
-    df_clean['datetime'] = pd.to_datetime(df_clean['datetime'])
-    df_clean = df_clean.sort_values('datetime').set_index('datetime')
-    
-    # Calculate rolling average for smoothing
-    df_clean['sal_smooth'] = df_clean['salinity'].rolling(window=window, center=True, min_periods=1).mean()
-    df_clean = df_clean.reset_index()
-    
-    # Create measurements list
-    measurements = []
-    for _, row in df_clean.iterrows():
-        measurements.append({
-            "datetime": row['datetime'].isoformat(),
-            "salinity": float(row['sal_smooth'])
-        })
-
-    if show_plot:
-        fig, ax = plt.subplots(figsize=(12, 6))
-        ax.plot(df_clean['datetime'], df_clean['sal_smooth'], color='blue', linewidth=2.5, label='Salinity Trend')
-        ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d %H:%M'))
-        ax.xaxis.set_major_locator(mdates.AutoDateLocator(maxticks=10))
-        plt.xticks(rotation=45, ha='right')
-        ax.yaxis.set_major_locator(plt.MaxNLocator(10))
-        ax.tick_params(axis='both', which='major', labelsize=10)
-        ax.set_xlabel('Date', fontsize=11, fontweight='bold')
-        ax.set_ylabel('Salinity (PSU)', fontsize=11, fontweight='bold')
-        ax.set_title('Salinity Time Series', fontsize=13, fontweight='bold')
-        ax.grid(True, alpha=0.3, linestyle='--')
-        ax.legend(loc='best')
-        plt.tight_layout()
-        plt.show()
-
-    return {
-        "profiles": [{
-            "profileId": 1,
-            "measurements": measurements
-        }]
-    }
+    return _trend(data, 'salinity', show_plot, window, color='blue', name='Salinity', unit='PSU')
 @mcp.tool
 def argo_stat_summary(data: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
@@ -218,12 +336,7 @@ def argo_stat_summary(data: List[Dict[str, Any]]) -> Dict[str, Any]:
         values = df[var].dropna()
         measurements.append({
             "variable": var,
-            "count": int(len(values)),
-            "mean": float(np.mean(values)),
-            "median": float(np.median(values)),
-            "std_dev": float(np.std(values)),
-            "min": float(np.min(values)),
-            "max": float(np.max(values)),
+            **_summary_stats(values),
         })
 
     return {
@@ -239,57 +352,13 @@ def argo_pressure_trend(data: List[Dict[str, Any]], show_plot: bool = False, win
     
     Args:
         data: List of dictionaries with 'datetime' and 'pressure' keys
-        show_plot: Whether to display a plot (default: False)
+        show_plot: Whether to render a plot, returned as base64 PNG under 'plot_png' (default: False)
         window: Rolling window size for smoothing (default: 20)
     
     Returns:
         Dictionary with profiles containing measurements (datetime and pressure)
     """
-    # Convert to DataFrame
-    df = pd.DataFrame(data)
-    
-    if 'datetime' not in df.columns or 'pressure' not in df.columns:
-        raise ValueError("Required columns: 'datetime', 'pressure'")
-
-    # Create time-series with datetime index
-    df_clean = df[['datetime', 'pressure']].dropna().copy()
-    df_clean['datetime'] = pd.to_datetime(df_clean['datetime'])
-    df_clean = df_clean.sort_values('datetime').set_index('datetime')
-    
-    # Calculate rolling average for smoothing
-    df_clean['press_smooth'] = df_clean['pressure'].rolling(window=window, center=True, min_periods=1).mean()
-    df_clean = df_clean.reset_index()
-    
-    # Create measurements list
-    measurements = []
-    for _, row in df_clean.iterrows():
-        measurements.append({
-            "datetime": row['datetime'].isoformat(),
-            "pressure": float(row['press_smooth'])
-        })
-
-    if show_plot:
-        fig, ax = plt.subplots(figsize=(12, 6))
-        ax.plot(df_clean['datetime'], df_clean['press_smooth'], color='green', linewidth=2.5, label='Pressure Trend')
-        ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d %H:%M'))
-        ax.xaxis.set_major_locator(mdates.AutoDateLocator(maxticks=10))
-        plt.xticks(rotation=45, ha='right')
-        ax.yaxis.set_major_locator(plt.MaxNLocator(10))
-        ax.tick_params(axis='both', which='major', labelsize=10)
-        ax.set_xlabel('Date', fontsize=11, fontweight='bold')
-        ax.set_ylabel('Pressure (dbar)', fontsize=11, fontweight='bold')
-        ax.set_title('Pressure Time Series', fontsize=13, fontweight='bold')
-        ax.grid(True, alpha=0.3, linestyle='--')
-        ax.legend(loc='best')
-        plt.tight_layout()
-        plt.show()
-
-    return {
-        "profiles": [{
-            "profileId": 1,
-            "measurements": measurements
-        }]
-    }
+    return _trend(data, 'pressure', show_plot, window, color='green', name='Pressure', unit='dbar')
 @mcp.tool
 def argo_ts_curve(data, show_plot: bool = False) -> Dict[str, List]:
     """
@@ -297,49 +366,37 @@ def argo_ts_curve(data, show_plot: bool = False) -> Dict[str, List]:
     
     Args:
         data: DataFrame or List of dictionaries with temperature and salinity columns
-        show_plot: Whether to display a plot (default: False)
+        show_plot: Whether to render a plot, returned as base64 PNG under 'plot_png' (default: False)
     
     Returns:
         Dictionary with profiles containing measurements (salinity and temperature)
     """
-    # Convert to DataFrame if needed
-    if isinstance(data, pd.DataFrame):
-        df = data
-    else:
-        df = pd.DataFrame(data)
-    
-    # Get temperature and salinity columns
-    temp_col = 'temperature' if 'temperature' in df.columns else 'TEMP'
-    sal_col = 'salinity' if 'salinity' in df.columns else 'SAL'
-    
-    # Clean data - remove NaN values
-    df_clean = df[[temp_col, sal_col]].dropna().copy()
-    df_clean.columns = ['temperature', 'salinity']
-    
-    # Sort by salinity
-    df_clean = df_clean.sort_values('salinity')
+    df_clean = prepare_ts_curve_frame(data)
     
-    # Create measurements list
-    measurements = []
-    for _, row in df_clean.iterrows():
-        measurements.append({
-            "salinity": float(row['salinity']),
-            "temperature": float(row['temperature'])
-        })
+    # Create measurements list (tolist() converts to Python floats in C)
+    curve = np.column_stack([
+        df_clean['salinity'].to_numpy(dtype=np.float64),
+        df_clean['temperature'].to_numpy(dtype=np.float64)
+    ]).tolist()
+    measurements = [{"salinity": sal, "temperature": temp} for sal, temp in curve]
     
+    result = {
+        "profiles": [{
+            "profileId": 1,
+            "measurements": measurements
+        }]
+    }
+
     if show_plot:
-        fig, ax = plt.subplots(figsize=(10, 8))
+        fig, ax = _ts_figure()
         
-        # Remove duplicate salinity values by averaging temperatures
-        df_unique = df_clean.groupby('salinity')['temperature'].mean().reset_index()
-        sal_unique = df_unique['salinity'].values
-        temp_unique = df_unique['temperature'].values
+        # Remove duplicate salinity values by averaging temperatures (float64 keeps the
+        # spline cache key bytes and the FITPACK input consistent for float32 frames)
+        sal_unique, temp_unique = _ts_unique_points(df_clean)
         
         # Create smooth spline curve
         if len(sal_unique) > 3:
-            from scipy.interpolate import UnivariateSpline
-            smoothing_factor = len(sal_unique) * 0.01
-            spline = UnivariateSpline(sal_unique, temp_unique, s=smoothing_factor, k=3)
+            spline = _ts_spline(sal_unique.tobytes(), temp_unique.tobytes())
             sal_smooth = np.linspace(sal_unique.min(), sal_unique.max(), 300)
             temp_smooth = spline(sal_smooth)
             ax.plot(sal_smooth, temp_smooth, 'b-', linewidth=2.5)
@@ -350,93 +407,57 @@ def argo_ts_curve(data, show_plot: bool = False) -> Dict[str, List]:
         ax.set_ylabel('Temperature (°C)', fontsize=12, fontweight='bold')
         ax.set_title('Temperature-Salinity (T-S) Diagram', fontsize=14, fontweight='bold')
         ax.grid(True, alpha=0.3, linestyle='--')
-        ax.xaxis.set_major_locator(plt.MaxNLocator(10))
-        ax.yaxis.set_major_locator(plt.MaxNLocator(10))
+        ax.xaxis.set_major_locator(MaxNLocator(10))
+        ax.yaxis.set_major_locator(MaxNLocator(10))
         ax.tick_params(axis='both', which='major', labelsize=10)
-        plt.tight_layout()
-        plt.show()
+        result["plot_png"] = _render_png(fig)
 
-    return {
-        "profiles": [{
-            "profileId": 1,
-            "measurements": measurements
-        }]
-    }
+    return result
 @mcp.tool
 def argo_td_curve(data: List[Dict[str, Any]], show_plot: bool = False) -> Dict[str, List]:
     """
     Generate Temperature-Depth (T-D) profile from ARGO data.
     
     Args:
-        data: List of dictionaries with 'temperature' and 'level' keys
-        show_plot: Whether to display a plot (default: False)
+        data: List of dictionaries (or a DataFrame) with 'temperature' and 'level' keys
+        show_plot: Whether to render a plot, returned as base64 PNG under 'plot_png' (default: False)
     
     Returns:
         Dictionary with profiles containing measurements (depth and temperature)
     """
-    # Convert to DataFrame
-    df = pd.DataFrame(data)
-    
-    # Get temperature and level columns
-    temp_col = 'temperature' if 'temperature' in df.columns else 'TEMP'
-    level_col = 'level' if 'level' in df.columns else 'LEVEL'
-    
-    if temp_col not in df.columns or level_col not in df.columns:
-        raise ValueError(f"Required columns: '{temp_col}' and '{level_col}'")
-    
-    # Clean data - remove NaN values
-    df_clean = df[[level_col, temp_col]].dropna().copy()
-    df_clean.columns = ['level', 'temperature']
-    
-    # Convert level to pressure (dbar)
-    pressure_levels = [5, 10, 20, 30, 50, 75, 100, 125, 150, 200, 250, 300, 400, 500, 
-                      600, 700, 800, 900, 1000, 1100, 1200, 1300, 1400, 1500, 1750, 2000]
-    
-    def level_to_pressure(level):
-        level_int = int(level)
-        if level_int < len(pressure_levels):
-            return pressure_levels[level_int]
-        else:
-            return pressure_levels[-1] + (level_int - len(pressure_levels) + 1) * 250
-    
-    df_clean['pressure'] = df_clean['level'].apply(level_to_pressure)
-    
-    # Convert pressure to depth using hydrostatic equation
-    rho = 1025  # kg/m³ (Indian Ocean seawater density)
-    g = 9.81    # m/s²
-    df_clean['depth'] = df_clean['pressure'] * 10000 / (rho * g)
-    
-    # Sort by depth
-    df_clean = df_clean.sort_values('depth')
-    
-    # Create measurements list
-    measurements = []
-    for _, row in df_clean.iterrows():
-        measurements.append({
-            "depth": float(row['depth']),
-            "temperature": float(row['temperature']),
-            "pressure": float(row['pressure'])
-        })
-    
+    df_clean = prepare_td_curve_frame(data)
+    
+    # Create measurements list (tolist() converts to Python floats in C)
+    curve = np.column_stack([
+        df_clean['depth'].to_numpy(dtype=np.float64),
+        df_clean['temperature'].to_numpy(dtype=np.float64),
+        df_clean['pressure'].to_numpy(dtype=np.float64)
+    ]).tolist()
+    measurements = [
+        {"depth": depth, "temperature": temp, "pressure": pressure}
+        for depth, temp, pressure in curve
+    ]
+    
+    result = {
+        "profiles": [{
+            "profileId": 1,
+            "measurements": measurements
+        }]
+    }
+
     if show_plot:
-        fig, ax = plt.subplots(figsize=(12, 6))
+        fig, ax = _new_figure(figsize=(12, 6))
         ax.plot(df_clean['depth'], df_clean['temperature'], 'r-', linewidth=2.5)
         ax.set_xlabel('Depth (m)', fontsize=12, fontweight='bold')
         ax.set_ylabel('Temperature (°C)', fontsize=12, fontweight='bold')
         ax.set_title('Temperature-Depth Profile', fontsize=14, fontweight='bold')
         ax.grid(True, alpha=0.3, linestyle='--')
-        ax.xaxis.set_major_locator(plt.MaxNLocator(10))
-        ax.yaxis.set_major_locator(plt.MaxNLocator(10))
+        ax.xaxis.set_major_locator(MaxNLocator(10))
+        ax.yaxis.set_major_locator(MaxNLocator(10))
         ax.tick_params(axis='both', which='major', labelsize=10)
-        plt.tight_layout()
-        plt.show()
+        result["plot_png"] = _render_png(fig)
     
-    return {
-        "profiles": [{
-            "profileId": 1,
-            "measurements": measurements
-        }]
-    }
+    return result
 
 if __name__ == "__main__":
     mcp.run()
\ No newline at end of file
@@ -1,6 +1,6 @@
+import base64
 import pandas as pd
 from sqlalchemy import create_engine
-import matplotlib.pyplot as plt
 
 
 import server
@@ -14,6 +14,14 @@ argo_stat_summary = server.argo_stat_summary.fn
 argo_ts_curve = server.argo_ts_curve.fn
 argo_comparison_tool = server.argo_comparison_tool.fn
 
+
+def save_plot(result, name):
+    """Write a tool's rendered plot (if any) to <name>.png"""
+    if "plot_png" in result:
+        with open(f"{name}.png", "wb") as f:
+            f.write(base64.b64decode(result["plot_png"]))
+        print(f"Plot saved to {name}.png")
+
 print("imported")
 # Replace these with your credentials
 engine = create_engine("postgresql://postgres:pubgcodgerena123@@localhost:5432/argo_db")
@@ -51,6 +59,7 @@ print("==="*40)
 print("trends tools")
 
 temp_result = argo_temp_trend(df.to_dict('records'), show_plot=True)
+save_plot(temp_result, "temp_trend")
 print("\nTemperature Trend Data Keys:", temp_result.keys())
 measurements = temp_result['profiles'][0]['measurements']
 print(f"Number of measurements: {len(measurements)}")
@@ -58,6 +67,7 @@ print("First few measurements:", measurements[:3])
 
 # 2️⃣ Salinity Trend
 sal_result = argo_salinity_trend(df.to_dict('records'), show_plot=True)
+save_plot(sal_result, "salinity_trend")
 print("\nSalinity Trend Data Keys:", sal_result.keys())
 measurements = sal_result['profiles'][0]['measurements']
 print(f"Number of measurements: {len(measurements)}")
@@ -65,6 +75,7 @@ print("First few measurements:", measurements[:3])
 
 # 3️⃣ Pressure Trend
 pres_result = argo_pressure_trend(df.to_dict('records'), show_plot=True)
+save_plot(pres_result, "pressure_trend")
 print("\nPressure Trend Data Keys:", pres_result.keys())
 measurements = pres_result['profiles'][0]['measurements']
 print(f"Number of measurements: {len(measurements)}")
@@ -82,6 +93,7 @@ for m in measurements:
 print("\n" + "==="*40)
 print("T-S Curve Tool")
 ts_result = argo_ts_curve(df.to_dict('records'), show_plot=True)
+save_plot(ts_result, "ts_curve")
 print("\nT-S Curve Data Keys:", ts_result.keys())
 measurements = ts_result['profiles'][0]['measurements']
 print(f"Number of measurements: {len(measurements)}")
@@ -95,6 +107,7 @@ print(f"Unique profiles: {df['global_profile_id'].nunique()}")
 print(f"Level range: {df['level'].min()} to {df['level'].max()}")
 print(f"Temperature range: {df['temperature'].min():.2f} to {df['temperature'].max():.2f}")
 td_result = argo_td_curve(df.to_dict('records'), show_plot=True)
+save_plot(td_result, "td_curve")
 print("\nT-D Curve Data Keys:", td_result.keys())
 measurements = td_result['profiles'][0]['measurements']
 print(f"Number of measurements: {len(measurements)}")
@@ -1,11 +1,18 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Tuple
+from functools import lru_cache
+import asyncio
 import os
+import time
 
+import numpy as np
+import orjson
 import pandas as pd
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from dotenv import load_dotenv
 
 from . import server  # relative import within analysis_tools  # your MCP tools
@@ -18,6 +25,8 @@ argo_ts_curve = server.argo_ts_curve.fn
 argo_td_curve = server.argo_td_curve.fn
 argo_temp_trend = server.argo_temp_trend.fn
 argo_comparison_tool = server.argo_comparison_tool.fn
+prepare_ts_curve_frame = server.prepare_ts_curve_frame
+prepare_td_curve_frame = server.prepare_td_curve_frame
 
 # --- DB setup using environment variables ---
 DB_HOST = os.getenv("DB_HOST", "localhost")
@@ -29,7 +38,21 @@ DB_NAME = os.getenv("DB_NAME", "floatchat_argo")
 DB_URL = f"postgresql+psycopg2://{DB_USERNAME}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 engine = create_engine(DB_URL)
 
-app = FastAPI(title="Argo Trend API")
+# Prepared profiles are reused for this long before being reloaded from the database
+PROFILE_CACHE_TTL_SECONDS = 300
+
+# Measured variables are NUMERIC in Postgres (read back as Decimal objects); float64
+# rather than float32 so values like 28.45 serialize as written, not with float32 noise
+MEASUREMENT_COLUMNS = ["temperature", "salinity", "pressure"]
+
+# Rows converted to Python objects per NDJSON chunk when streaming (?stream=true)
+NDJSON_CHUNK_ROWS = 1000
+
+# Default maximum points per returned curve (?downsample=); charts can't show more
+DEFAULT_DOWNSAMPLE_POINTS = 2000
+
+# orjson serializes the large float-heavy profile payloads far faster than the stdlib json encoder
+app = FastAPI(title="Argo Trend API", default_response_class=ORJSONResponse)
 
 # Allow your dashboard origin to call this API (adjust origin)
 app.add_middleware(
@@ -40,11 +63,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Measurement payloads (repeated keys, similar floats) shrink ~10-20x under gzip;
+# level 6 compresses far faster than the network can carry the raw JSON
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=6)
+
 
 class ProfilesResponse(BaseModel):
     profiles: List[Dict[str, Any]]
 
 
+# Documented in the OpenAPI schema only; response_model=None skips re-validating
+# every measurement dict before serialization
+PROFILES_RESPONSES = {200: {"model": ProfilesResponse}}
+
+
 def load_profile_data(float_id: str, limit: int = 200) -> pd.DataFrame:
     query = f"""
     SELECT
@@ -67,14 +99,158 @@ def load_profile_data(float_id: str, limit: int = 200) -> pd.DataFrame:
     return pd.read_sql(query, engine)
 
 
-@app.get("/api/ts_curve", response_model=ProfilesResponse)
-def ts_curve(float_id: str, limit: int = 200):
+def load_profiles_data(float_ids: List[str], limit: int = 200) -> pd.DataFrame:
+    """Load several floats in one query, keeping at most `limit` rows per float."""
+    query = text("""
+    SELECT float_id, global_profile_id, level, pressure, temperature,
+           salinity, latitude, longitude, datetime
+    FROM (
+        SELECT
+            p.float_id,
+            p.global_profile_id,
+            m.level,
+            m.pressure,
+            m.temperature,
+            m.salinity,
+            m.latitude,
+            m.longitude,
+            m.datetime,
+            ROW_NUMBER() OVER (
+                PARTITION BY p.float_id ORDER BY p.global_profile_id, m.level
+            ) AS rn
+        FROM argo_profiles p
+        JOIN argo_measurements m
+            ON m.global_profile_id = p.global_profile_id
+        WHERE p.float_id = ANY(:float_ids)
+    ) ranked
+    WHERE rn <= :limit
+    ORDER BY float_id, global_profile_id, level;
+    """)
+    return pd.read_sql(query, engine, params={"float_ids": list(float_ids), "limit": limit})
+
+
+def _prepare_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Parse timestamps and cast measurements to float64 in place."""
+    df["datetime"] = pd.to_datetime(df["datetime"])
+    df[MEASUREMENT_COLUMNS] = df[MEASUREMENT_COLUMNS].astype(np.float64)
+    return df
+
+
+@lru_cache(maxsize=64)
+def _prepare_profile(float_id: str, limit: int, ttl_bucket: int) -> pd.DataFrame:
+    """Load a float's profile data, parse timestamps and cast measurements once (cached per TTL bucket)."""
+    return _prepare_frame(load_profile_data(float_id, limit))
+
+
+@lru_cache(maxsize=64)
+def _prepare_profile_group(float_ids: Tuple[str, ...], limit: int, ttl_bucket: int) -> Tuple[pd.DataFrame, ...]:
+    """Load several floats with one query and split them per float (cached per TTL bucket)."""
+    df = _prepare_frame(load_profiles_data(list(float_ids), limit))
+    groups = {fid: grp.reset_index(drop=True) for fid, grp in df.groupby("float_id", sort=False)}
+    return tuple(groups.get(fid, df.iloc[:0]) for fid in float_ids)
+
+
+def get_profile_data(float_id: str, limit: int = 200) -> pd.DataFrame:
+    """
+    Cached profile data for a float, shared by all endpoints.
+
+    Repeated requests for the same float (dashboard polling) skip the database
+    round-trip and datetime parsing. The frame is shared between requests, so
+    callers must treat it as read-only; the analysis tools only ever slice it.
+    """
+    return _prepare_profile(float_id, limit, int(time.time() // PROFILE_CACHE_TTL_SECONDS))
+
+
+async def load_profile_pair(float_id_a: str, float_id_b: str, limit: int = 200) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Load two floats with a single query (one round-trip and plan) off the event loop."""
+    df_a, df_b = await asyncio.to_thread(
+        _prepare_profile_group,
+        (float_id_a, float_id_b),
+        limit,
+        int(time.time() // PROFILE_CACHE_TTL_SECONDS),
+    )
+    return df_a, df_b
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    Returns the indices of at most `threshold` points of the (x-sorted) series
+    that best preserve its visual shape. First and last points are always kept.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    every = (n - 2) / (threshold - 2)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+
+        # Third triangle vertex: mean of the next bucket
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        areas = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(areas))
+        indices[i + 1] = a
+
+    return indices
+
+
+def _downsample_frame(frame: pd.DataFrame, x_col: str, y_col: str, threshold: int) -> pd.DataFrame:
+    """LTTB-downsample a cleaned, x-sorted curve frame (threshold <= 0 disables)."""
+    if threshold <= 0 or len(frame) <= threshold:
+        return frame
+    return frame.iloc[lttb_indices(frame[x_col].to_numpy(), frame[y_col].to_numpy(), threshold)]
+
+
+def _downsample_comparison(result: Dict[str, Any], axis_var: str, variable: str, threshold: int) -> Dict[str, Any]:
+    """LTTB-downsample each comparison profile's curve points, keeping its stats entry intact."""
+    if threshold <= 0:
+        return result
+    for profile in result["profiles"]:
+        stats, curve = profile["measurements"][0], profile["measurements"][1:]
+        if len(curve) > threshold:
+            x = np.fromiter((m[axis_var] for m in curve), dtype=np.float64, count=len(curve))
+            y = np.fromiter((m[variable] for m in curve), dtype=np.float64, count=len(curve))
+            profile["measurements"] = [stats] + [curve[i] for i in lttb_indices(x, y, threshold)]
+    return result
+
+
+def _ndjson_stream(frame: pd.DataFrame, columns: List[str]) -> Iterator[bytes]:
+    """Yield one JSON object per row, converting only NDJSON_CHUNK_ROWS rows at a time."""
+    arrays = [frame[col].to_numpy() for col in columns]
+    for start in range(0, len(frame), NDJSON_CHUNK_ROWS):
+        rows = zip(*(arr[start:start + NDJSON_CHUNK_ROWS].tolist() for arr in arrays))
+        yield b"".join(orjson.dumps(dict(zip(columns, row))) + b"\n" for row in rows)
+
+
+@app.get("/api/ts_curve", response_model=None, responses=PROFILES_RESPONSES)
+def ts_curve(float_id: str, limit: int = 200, stream: bool = False, downsample: int = DEFAULT_DOWNSAMPLE_POINTS):
     try:
-        df = load_profile_data(float_id, limit)
+        df = get_profile_data(float_id, limit)
         if df.empty:
             raise HTTPException(status_code=404, detail="No data for this float_id")
 
-        result = argo_ts_curve(df.to_dict("records"), show_plot=False)
+        frame = _downsample_frame(prepare_ts_curve_frame(df), "salinity", "temperature", downsample)
+
+        if stream:
+            # NDJSON: one {"salinity", "temperature"} measurement per line
+            return StreamingResponse(_ndjson_stream(frame, ["salinity", "temperature"]), media_type="application/x-ndjson")
+
+        result = argo_ts_curve(frame, show_plot=False)
         return result  # { profiles: [...] }
     except HTTPException:
         raise
@@ -82,14 +258,20 @@ def ts_curve(float_id: str, limit: int = 200):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/td_curve", response_model=ProfilesResponse)
-def td_curve(float_id: str, limit: int = 200):
+@app.get("/api/td_curve", response_model=None, responses=PROFILES_RESPONSES)
+def td_curve(float_id: str, limit: int = 200, stream: bool = False, downsample: int = DEFAULT_DOWNSAMPLE_POINTS):
     try:
-        df = load_profile_data(float_id, limit)
+        df = get_profile_data(float_id, limit)
         if df.empty:
             raise HTTPException(status_code=404, detail="No data for this float_id")
 
-        result = argo_td_curve(df.to_dict("records"), show_plot=False)
+        frame = _downsample_frame(prepare_td_curve_frame(df), "depth", "temperature", downsample)
+
+        if stream:
+            # NDJSON: one {"depth", "temperature", "pressure"} measurement per line
+            return StreamingResponse(_ndjson_stream(frame, ["depth", "temperature", "pressure"]), media_type="application/x-ndjson")
+
+        result = argo_td_curve(frame, show_plot=False)
         return result
     except HTTPException:
         raise
@@ -97,28 +279,30 @@ def td_curve(float_id: str, limit: int = 200):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/compare_td", response_model=ProfilesResponse)
-def compare_td(float_id_a: str, float_id_b: str, limit: int = 200):
+@app.get("/api/compare_td", response_model=None, responses=PROFILES_RESPONSES)
+async def compare_td(float_id_a: str, float_id_b: str, limit: int = 200, downsample: int = DEFAULT_DOWNSAMPLE_POINTS):
     """Compare temperature–pressure profiles for two floats.
 
     Uses argo_comparison_tool to build profiles for each float,
-    with curve data along the pressure axis.
+    with curve data along the pressure axis (LTTB-downsampled to
+    at most `downsample` points per float; 0 disables).
     """
     try:
-        df_a = load_profile_data(float_id_a, limit)
-        df_b = load_profile_data(float_id_b, limit)
+        df_a, df_b = await load_profile_pair(float_id_a, float_id_b, limit)
 
         if df_a.empty:
             raise HTTPException(status_code=404, detail=f"No data for float_id_a={float_id_a}")
         if df_b.empty:
             raise HTTPException(status_code=404, detail=f"No data for float_id_b={float_id_b}")
 
-        result = argo_comparison_tool(
-            datasets=[df_a.to_dict("records"), df_b.to_dict("records")],
+        result = await asyncio.to_thread(
+            argo_comparison_tool,
+            datasets=[df_a, df_b],
             labels=[float_id_a, float_id_b],
             variable="temperature",
             axis_var="pressure",
         )
+        result = _downsample_comparison(result, "pressure", "temperature", downsample)
         return result  # {"profiles": [...]}
     except HTTPException:
         raise
@@ -126,28 +310,30 @@ def compare_td(float_id_a: str, float_id_b: str, limit: int = 200):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/compare_ts", response_model=ProfilesResponse)
-def compare_ts(float_id_a: str, float_id_b: str, limit: int = 200):
+@app.get("/api/compare_ts", response_model=None, responses=PROFILES_RESPONSES)
+async def compare_ts(float_id_a: str, float_id_b: str, limit: int = 200, downsample: int = DEFAULT_DOWNSAMPLE_POINTS):
     """Compare temperature–salinity (T–S) profiles for two floats.
 
     Uses argo_comparison_tool to build profiles for each float,
-    with curve data along the salinity axis.
+    with curve data along the salinity axis (LTTB-downsampled to
+    at most `downsample` points per float; 0 disables).
     """
     try:
-        df_a = load_profile_data(float_id_a, limit)
-        df_b = load_profile_data(float_id_b, limit)
+        df_a, df_b = await load_profile_pair(float_id_a, float_id_b, limit)
 
         if df_a.empty:
             raise HTTPException(status_code=404, detail=f"No data for float_id_a={float_id_a}")
         if df_b.empty:
             raise HTTPException(status_code=404, detail=f"No data for float_id_b={float_id_b}")
 
-        result = argo_comparison_tool(
-            datasets=[df_a.to_dict("records"), df_b.to_dict("records")],
+        result = await asyncio.to_thread(
+            argo_comparison_tool,
+            datasets=[df_a, df_b],
             labels=[float_id_a, float_id_b],
             variable="temperature",
             axis_var="salinity",
         )
+        result = _downsample_comparison(result, "salinity", "temperature", downsample)
         return result
     except HTTPException:
         raise
@@ -14,7 +14,8 @@ def argo_ts_curve(data, show_plot: bool = False) -> Dict[str, List]:
         show_plot: Whether to display a plot (default: False)
     
     Returns:
-        Dictionary with 'x' (salinity values) and 'y' (temperature values)
+        Dictionary with 'x' (salinity values) and 'y' (temperature values) as numpy
+        arrays; call .tolist() at the JSON serialization boundary if needed
     """
     # Convert to DataFrame if needed
     if isinstance(data, pd.DataFrame):
@@ -27,24 +28,23 @@ def argo_ts_curve(data, show_plot: bool = False) -> Dict[str, List]:
     sal_col = 'salinity' if 'salinity' in df.columns else 'SAL'
     
     # Clean data - remove NaN values
-    df_clean = df[[temp_col, sal_col]].dropna().copy()
-    df_clean.columns = ['temperature', 'salinity']
+    df_clean = df[[temp_col, sal_col]].dropna()
+    df_clean = df_clean.rename(columns={temp_col: 'temperature', sal_col: 'salinity'})
     
-    # Extract x (salinity) and y (temperature)
-    x = df_clean['salinity'].tolist()
-    y = df_clean['temperature'].tolist()
+    # Extract x (salinity) and y (temperature) without boxing every value
+    x = df_clean['salinity'].to_numpy()
+    y = df_clean['temperature'].to_numpy()
     
     result = {"x": x, "y": y}
     if show_plot:
         fig, ax = plt.subplots(figsize=(10, 8))
         
-        # Sort data by salinity
-        df_sorted = df_clean.sort_values('salinity')
-        
         # Remove duplicate salinity values by averaging temperatures
-        df_unique = df_sorted.groupby('salinity')['temperature'].mean().reset_index()
-        sal_unique = df_unique['salinity'].values
-        temp_unique = df_unique['temperature'].values
+        # (np.unique returns sorted keys, so no separate sort is needed)
+        sal = df_clean['salinity'].to_numpy()
+        temp = df_clean['temperature'].to_numpy()
+        sal_unique, inv = np.unique(sal, return_inverse=True)
+        temp_unique = np.bincount(inv, weights=temp) / np.bincount(inv)
         
         # Create smooth spline curve
         if len(sal_unique) > 3:
@@ -8,7 +8,12 @@ import os
 from pathlib import Path
 from typing import Dict, Any, List, Optional
 import json
+import logging
 import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 
 # Add parent directories to path
 sys.path.append(str(Path(__file__).parent.parent.parent))
@@ -17,6 +22,10 @@ from float_chat_mcp.data_access_tools.query_builder_tool import QueryBuilderTool
 from float_chat_mcp.data_access_tools.vector_retrieval_tool import VectorRetrievalTool
 from float_chat_mcp.data_access_tools.db_executor_tool import DatabaseExecutorTool
 
+# Completed query results are reused for repeated questions (bounded LRU, expires after TTL)
+QUERY_CACHE_MAX_ENTRIES = 256
+QUERY_CACHE_TTL_SECONDS = 300
+
 class DataAccessOrchestrator:
     """Orchestrates all data access tools for intelligent query execution"""
     
@@ -31,6 +40,12 @@ class DataAccessOrchestrator:
         self.query_builder = QueryBuilderTool(use_gemini=use_gemini)
         self.vector_tool = VectorRetrievalTool()
         self.db_tool = DatabaseExecutorTool(enable_cache=enable_cache)
+        self.logger = logging.getLogger(__name__)
+        
+        # user query -> (stored_at, results, intent, plan); skips intent analysis on repeats
+        self.enable_cache = enable_cache
+        self._query_cache = OrderedDict()
+        self._query_cache_lock = threading.Lock()
     
     def execute_query(self, user_query: str) -> Dict[str, Any]:
         """
@@ -43,14 +58,32 @@ class DataAccessOrchestrator:
             Complete query results with metadata
         """
         start_time = time.time()
+        cache_key = " ".join(user_query.split())
+        
+        # Nothing to analyze: answer without touching Gemini, SQL or the vector store
+        if not cache_key:
+            return {
+                "status": "error",
+                "strategy": "none",
+                "results": [],
+                "error": "empty query",
+                "query": user_query,
+                "execution_time": f"{time.time() - start_time:.2f}s"
+            }
+        
+        cached = self._get_cached_query(cache_key)
+        if cached is not None:
+            self.logger.info("💾 Reusing cached result for: '%s'", user_query)
+            results, intent, plan = cached
+            return self._with_metadata(dict(results), user_query, intent, plan, start_time, cache_hit=True)
         
         try:
             # Step 1: Analyze intent and build execution plan
-            print(f"🧠 Analyzing query: '{user_query}'")
+            self.logger.info("🧠 Analyzing query: '%s'", user_query)
             intent = self.query_builder.analyze_intent(user_query)
             plan = self.query_builder.build_execution_plan(intent)
             
-            print(f"📋 Strategy: {plan['strategy']} (confidence: {intent['confidence']:.2f})")
+            self.logger.info("📋 Strategy: %s (confidence: %.2f)", plan['strategy'], intent['confidence'])
             
             # Step 2: Execute based on strategy
             if plan["strategy"] == "sql_only":
@@ -62,19 +95,11 @@ class DataAccessOrchestrator:
             else:
                 results = self._execute_fallback_strategy(plan, intent)
             
-            # Step 3: Add execution metadata
-            execution_time = time.time() - start_time
-            results.update({
-                "query_metadata": {
-                    "original_query": user_query,
-                    "intent_analysis": intent,
-                    "execution_plan": plan,
-                    "execution_time": f"{execution_time:.2f}s",
-                    "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
-                }
-            })
+            if results.get("status") == "success":
+                self._cache_query(cache_key, dict(results), intent, plan)
             
-            return results
+            # Step 3: Add execution metadata
+            return self._with_metadata(results, user_query, intent, plan, start_time)
             
         except Exception as e:
             return {
@@ -84,9 +109,60 @@ class DataAccessOrchestrator:
                 "execution_time": f"{time.time() - start_time:.2f}s"
             }
     
+    def _with_metadata(
+        self,
+        results: Dict[str, Any],
+        user_query: str,
+        intent: Dict[str, Any],
+        plan: Dict[str, Any],
+        start_time: float,
+        cache_hit: bool = False
+    ) -> Dict[str, Any]:
+        """Attach per-call execution metadata to a results dict"""
+        execution_time = time.time() - start_time
+        results["query_metadata"] = {
+            "original_query": user_query,
+            "intent_analysis": intent,
+            "execution_plan": plan,
+            "execution_time": f"{execution_time:.2f}s",
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "cache_hit": cache_hit,
+            "total_data_points": sum(map(_count_data_points, results.get("results", [])))
+        }
+        return results
+    
+    def _get_cached_query(self, cache_key: str) -> Optional[tuple]:
+        """Get (results, intent, plan) for a recently executed query, if still fresh"""
+        if not self.enable_cache:
+            return None
+        
+        with self._query_cache_lock:
+            entry = self._query_cache.get(cache_key)
+            if entry is None:
+                return None
+            
+            stored_at, results, intent, plan = entry
+            if time.time() - stored_at > QUERY_CACHE_TTL_SECONDS:
+                del self._query_cache[cache_key]
+                return None
+            
+            self._query_cache.move_to_end(cache_key)
+            return results, intent, plan
+    
+    def _cache_query(self, cache_key: str, results: Dict[str, Any], intent: Dict[str, Any], plan: Dict[str, Any]):
+        """Store a successful query result, evicting the least recently used entry when full"""
+        if not self.enable_cache:
+            return
+        
+        with self._query_cache_lock:
+            self._query_cache[cache_key] = (time.time(), results, intent, plan)
+            self._query_cache.move_to_end(cache_key)
+            if len(self._query_cache) > QUERY_CACHE_MAX_ENTRIES:
+                self._query_cache.popitem(last=False)
+    
     def _execute_sql_strategy(self, plan: Dict[str, Any], intent: Dict[str, Any]) -> Dict[str, Any]:
         """Execute SQL-only strategy"""
-        print("🗄️ Executing SQL strategy...")
+        self.logger.info("🗄️ Executing SQL strategy...")
         
         results = {
             "status": "success",
@@ -103,11 +179,11 @@ class DataAccessOrchestrator:
             params = query_spec["params"]
             query_type = query_spec["type"]
             
-            print(f"   📋 Executing: {method_name}")
+            self.logger.debug("   📋 Executing: %s", method_name)
             
             # Check if this is a Gemini-generated query with precomputed results
             if query_type == "gemini_generated" and "precomputed_result" in query_spec:
-                print(f"   🧠 Gemini AI-powered query (precomputed)")
+                self.logger.debug("   🧠 Gemini AI-powered query (precomputed)")
                 
                 # Use precomputed results (already executed by Gemini generator)
                 result = query_spec["precomputed_result"]
@@ -115,10 +191,10 @@ class DataAccessOrchestrator:
                 # Add analysis from params if available
                 if params.get("analysis"):
                     result["analysis"] = params["analysis"]
-                    print(f"   🧠 Gemini Analysis: {result['analysis'][:80]}...")
+                    self.logger.debug("   🧠 Gemini Analysis: %.80s...", result['analysis'])
                 
                 if "gemini_metadata" in query_spec:
-                    print(f"   ✅ Validation: {query_spec['gemini_metadata']['validation']}")
+                    self.logger.debug("   ✅ Validation: %s", query_spec['gemini_metadata']['validation'])
                 
                 results["results"].append({
                     "query_type": query_type,
@@ -134,11 +210,11 @@ class DataAccessOrchestrator:
                 
                 # Log the SQL query if available
                 if isinstance(result, dict) and "sql" in result:
-                    print(f"   🔍 SQL Query: {result['sql'][:100]}...")
+                    self.logger.debug("   🔍 SQL Query: %.100s...", result['sql'])
                     if result.get("cache_hit"):
-                        print(f"   💾 Cache HIT - Retrieved from Redis")
+                        self.logger.debug("   💾 Cache HIT - Retrieved from Redis")
                     if result.get("analysis"):
-                        print(f"   🧠 Gemini Analysis: {result['analysis'][:80]}...")
+                        self.logger.debug("   🧠 Gemini Analysis: %.80s...", result['analysis'])
                 
                 results["results"].append({
                     "query_type": query_type,
@@ -152,13 +228,13 @@ class DataAccessOrchestrator:
             entities = intent["entities"]
             
             if entities["regions"]:
-                print(f"   📋 Fallback: Regional search for {entities['regions'][0]}")
+                self.logger.debug("   📋 Fallback: Regional search for %s", entities['regions'][0])
                 result = self.db_tool.get_profiles_by_region(
                     region=entities["regions"][0],
                     database=database
                 )
                 if isinstance(result, dict) and "sql" in result:
-                    print(f"   🔍 SQL Query: {result['sql']}")
+                    self.logger.debug("   🔍 SQL Query: %s", result['sql'])
                 
                 results["results"].append({
                     "query_type": "regional_search",
@@ -167,14 +243,14 @@ class DataAccessOrchestrator:
                 results["data_sources"].append(f"PostgreSQL ({database})")
             
             elif entities["float_ids"]:
-                print(f"   📋 Fallback: Float search for {entities['float_ids'][0]}")
+                self.logger.debug("   📋 Fallback: Float search for %s", entities['float_ids'][0])
                 result = self.db_tool.get_profiles_by_float_id(
                     float_id=entities["float_ids"][0],
                     database=database,
                     include_measurements=True
                 )
                 if isinstance(result, dict) and "sql" in result:
-                    print(f"   🔍 SQL Query: {result['sql']}")
+                    self.logger.debug("   🔍 SQL Query: %s", result['sql'])
                 
                 results["results"].append({
                     "query_type": "float_lookup",
@@ -183,7 +259,7 @@ class DataAccessOrchestrator:
                 results["data_sources"].append(f"PostgreSQL ({database})")
             
             else:
-                print("   ⚠️ No specific entities found, performing general database stats")
+                self.logger.debug("   ⚠️ No specific entities found, performing general database stats")
                 result = self.db_tool.get_database_stats(database)
                 results["results"].append({
                     "query_type": "general_stats",
@@ -195,7 +271,7 @@ class DataAccessOrchestrator:
     
     def _execute_vector_strategy(self, plan: Dict[str, Any], intent: Dict[str, Any]) -> Dict[str, Any]:
         """Execute vector-only strategy"""
-        print("🧠 Executing vector search strategy...")
+        self.logger.info("🧠 Executing vector search strategy...")
         
         # Perform semantic search
         vector_result = self.vector_tool.search_profiles(
@@ -215,7 +291,7 @@ class DataAccessOrchestrator:
     
     def _execute_hybrid_strategy(self, plan: Dict[str, Any], intent: Dict[str, Any]) -> Dict[str, Any]:
         """Execute hybrid strategy (vector + SQL)"""
-        print("🔄 Executing hybrid strategy...")
+        self.logger.info("🔄 Executing hybrid strategy...")
         
         results = {
             "status": "success",
@@ -225,48 +301,71 @@ class DataAccessOrchestrator:
             "execution_steps": []
         }
         
-        # Execute each step in the hybrid plan
-        for step in plan["execution_steps"]:
-            if step["type"] == "vector_search":
-                print(f"   Step {step['step']}: Vector search...")
-                vector_result = self.vector_tool.search_profiles(
-                    query_text=step["query"],
-                    n_results=step["n_results"]
-                )
+        # Consecutive steps of the same type are independent and run concurrently;
+        # an SQL refinement uses the profile IDs found by every vector search before it
+        profile_ids = []
+        for layer in self._hybrid_step_layers(plan["execution_steps"]):
+            if len(layer) > 1:
+                with ThreadPoolExecutor(max_workers=len(layer)) as pool:
+                    step_results = list(pool.map(lambda step: self._run_hybrid_step(step, profile_ids), layer))
+            else:
+                step_results = [self._run_hybrid_step(layer[0], profile_ids)]
+            
+            for step, step_result in zip(layer, step_results):
+                if step_result is None:
+                    continue
                 
                 results["execution_steps"].append({
                     "step": step["step"],
-                    "type": "vector_search",
-                    "result": vector_result
+                    "type": step["type"],
+                    "result": step_result
                 })
                 
-                # Extract profile IDs for next step
-                if vector_result["status"] == "success":
-                    profile_ids = [
-                        int(result["profile_id"]) 
-                        for result in vector_result["results"]
-                        if result["profile_id"].isdigit()
-                    ]
-                    
-            elif step["type"] == "sql_refinement":
-                print(f"   Step {step['step']}: SQL refinement...")
-                if 'profile_ids' in locals() and profile_ids:
-                    sql_result = self.db_tool.get_measurements_by_profile_ids(
-                        profile_ids=profile_ids[:20],  # Limit to first 20
-                        parameters=step["params"]["parameters"]
-                    )
-                    
-                    results["execution_steps"].append({
-                        "step": step["step"],
-                        "type": "sql_refinement", 
-                        "result": sql_result
-                    })
+                # Extract profile IDs for the next layer
+                if step["type"] == "vector_search" and step_result["status"] == "success":
+                    profile_ids.extend(self._numeric_profile_ids(step_result["results"]))
         
         return results
     
+    def _numeric_profile_ids(self, search_results: List[Dict[str, Any]]) -> List[int]:
+        """Integer profile IDs from vector search hits, skipping non-numeric IDs (vectorized)"""
+        if not search_results:
+            return []
+        ids = np.array([result["profile_id"] for result in search_results], dtype=str)
+        return ids[np.char.isdecimal(ids)].astype(np.int64).tolist()
+    
+    def _hybrid_step_layers(self, steps: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Group consecutive hybrid plan steps of the same type into independent layers"""
+        layers = []
+        for step in steps:
+            if layers and layers[-1][0]["type"] == step["type"]:
+                layers[-1].append(step)
+            else:
+                layers.append([step])
+        return layers
+    
+    def _run_hybrid_step(self, step: Dict[str, Any], profile_ids: List[int]) -> Optional[Dict[str, Any]]:
+        """Run a single hybrid plan step (None if there is nothing to run)"""
+        if step["type"] == "vector_search":
+            self.logger.debug("   Step %s: Vector search...", step['step'])
+            return self.vector_tool.search_profiles(
+                query_text=step["query"],
+                n_results=step["n_results"]
+            )
+        
+        if step["type"] == "sql_refinement":
+            self.logger.debug("   Step %s: SQL refinement...", step['step'])
+            if profile_ids:
+                return self.db_tool.get_measurements_by_profile_ids(
+                    profile_ids=list(dict.fromkeys(profile_ids))[:20],  # First 20 unique IDs
+                    parameters=step["params"]["parameters"]
+                )
+        
+        return None
+    
     def _execute_fallback_strategy(self, plan: Dict[str, Any], intent: Dict[str, Any]) -> Dict[str, Any]:
         """Execute fallback strategy for unclear queries"""
-        print("❓ Executing fallback strategy...")
+        self.logger.info("❓ Executing fallback strategy...")
         
         # Try a general vector search
         vector_result = self.vector_tool.search_profiles(
@@ -285,16 +384,17 @@ class DataAccessOrchestrator:
     
     def get_system_status(self) -> Dict[str, Any]:
         """Get status of all data access components"""
-        print("📊 Checking system status...")
-        
-        # Check vector database
-        vector_stats = self.vector_tool.get_collection_stats()
+        self.logger.info("📊 Checking system status...")
         
-        # Check main database
-        main_db_stats = self.db_tool.get_database_stats("main")
+        # Check vector, main and live databases concurrently (wall-clock = slowest check)
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            vector_future = pool.submit(self.vector_tool.get_collection_stats)
+            main_future = pool.submit(self.db_tool.get_database_stats, "main")
+            live_future = pool.submit(self.db_tool.get_database_stats, "live")
         
-        # Check live database
-        live_db_stats = self.db_tool.get_database_stats("live")
+        vector_stats = vector_future.result()
+        main_db_stats = main_future.result()
+        live_db_stats = live_future.result()
         
         return {
             "status": "operational",
@@ -322,6 +422,18 @@ class DataAccessOrchestrator:
             ]
         }
 
+def _count_data_points(res: Any) -> int:
+    """row_count (or total_results) of a direct or nested (orchestrator) result entry"""
+    if not isinstance(res, dict):
+        return 0
+    
+    # Direct results carry the counts themselves; nested ones under "result"
+    inner = res if ("row_count" in res or "total_results" in res) else res.get("result")
+    if not isinstance(inner, dict):
+        return 0
+    
+    return inner.get("row_count", inner.get("total_results", 0))
+
 def demo_data_access_system():
     """Demonstrate the complete data access system"""
     print("🚀 FloatChat Data Access System Demo")
@@ -349,23 +461,7 @@ def demo_data_access_system():
         print(f"⏱️ Time: {result.get('query_metadata', {}).get('execution_time', 'N/A')}")
         
         if result["status"] == "success":
-            data_count = 0
-            for res in result.get("results", []):
-                if isinstance(res, dict):
-                    # Handle direct results
-                    if "row_count" in res:
-                        data_count += res["row_count"]
-                    elif "total_results" in res:
-                        data_count += res["total_results"]
-                    # Handle nested results (from orchestrator)
-                    elif "result" in res and isinstance(res["result"], dict):
-                        inner_result = res["result"]
-                        if "row_count" in inner_result:
-                            data_count += inner_result["row_count"]
-                        elif "total_results" in inner_result:
-                            data_count += inner_result["total_results"]
-            
-            print(f"📊 Data points: {data_count}")
+            print(f"📊 Data points: {result['query_metadata']['total_data_points']}")
         
         print()
     
@@ -385,4 +481,5 @@ def demo_data_access_system():
     print("\n🎉 Data Access System Demo Complete!")
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     demo_data_access_system()
\ No newline at end of file
@@ -4,16 +4,69 @@ Executes SQL queries on PostgreSQL Argo databases
 """
 
 import os
-import psycopg2
+import re
+import tempfile
+import threading
+from hashlib import blake2b
+from types import MappingProxyType
+from psycopg2.pool import ThreadedConnectionPool
+from contextlib import contextmanager
+from io import StringIO
 import pandas as pd
 from typing import Dict, Any, List, Optional, Union
 import json
 from dotenv import load_dotenv
 import logging
+import redis
+from redis.backoff import NoBackoff
+from redis.retry import Retry
+
+# Optional columnar Arrow transport (return_format="arrow")
+try:
+    import pyarrow as pa
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
 
 # Load environment variables
 load_dotenv()
 
+# Postgres type OIDs that COPY ... CSV renders as text and pandas must not re-infer
+TEXT_TYPE_OIDS = {18, 19, 25, 1042, 1043}  # char, name, text, bpchar, varchar
+DATETIME_TYPE_OIDS = {1082, 1114, 1184}  # date, timestamp, timestamptz
+BOOL_TYPE_OID = 16
+
+# COPY ... CSV spellings of booleans and NULL (an explicit marker, so NULL and '' stay distinct)
+COPY_BOOL_VALUES = MappingProxyType({"t": True, "f": False})
+COPY_NULL_MARKER = r"\N"
+
+# Keywords that make a query unsafe to execute, matched as whole words in a single pass
+DANGEROUS_SQL_KEYWORDS = ('drop', 'delete', 'truncate', 'insert', 'update', 'alter', 'create', 'exec')
+DANGEROUS_SQL_RE = re.compile(r'\b(?:' + '|'.join(DANGEROUS_SQL_KEYWORDS) + r')\b')
+
+# Region boundaries for get_profiles_by_region
+REGION_BOUNDS = MappingProxyType({
+    "Arabian Sea": {"lat": (0, 30), "lng": (50, 80)},
+    "Bay of Bengal": {"lat": (0, 30), "lng": (80, 100)},
+    "Southern Indian Ocean": {"lat": (-40, 0), "lng": (20, 120)},
+    "Northern Indian Ocean": {"lat": (30, 90), "lng": (20, 120)},
+    "Indian Ocean": {"lat": (-40, 30), "lng": (20, 120)}
+})
+
+# Connections kept open per database (main/live) and reused across queries
+POOL_MIN_CONNECTIONS = 2
+POOL_MAX_CONNECTIONS = 10
+
+# COPY output above this size spills to a temp file instead of staying in memory
+COPY_SPOOL_MAX_BYTES = 16 * 1024 * 1024
+
+# Rows fetched per round-trip when a result has to be read through a cursor
+CURSOR_FETCH_ROWS = 10_000
+
+# How long cached query results live in Redis, per database; live results match
+# the orchestrator's QUERY_CACHE_TTL_SECONDS so "latest data" stays fresh
+CACHE_TTL_SECONDS = MappingProxyType({"main": 3600, "live": 300})
+
 class DatabaseExecutorTool:
     """SQL execution tool for Argo float databases"""
     
@@ -22,7 +75,7 @@ class DatabaseExecutorTool:
         Initialize database connections
         
         Args:
-            enable_cache: Whether to enable caching (for future use)
+            enable_cache: Whether to cache query results in Redis (skipped if Redis is unreachable)
         """
         self.main_db_config = {
             'host': os.getenv('DB_HOST', 'localhost'),
@@ -41,7 +94,11 @@ class DatabaseExecutorTool:
         }
         
         self.logger = logging.getLogger(__name__)
-        self.cache = None  # Placeholder for future caching implementation
+        self.cache = self._connect_cache() if enable_cache else None
+        
+        # Connection pools are created lazily, on first query per database
+        self._pools = {}
+        self._pool_lock = threading.Lock()
     
     def execute_query(
         self, 
@@ -50,18 +107,22 @@ class DatabaseExecutorTool:
         return_format: str = "dict",
         use_cache: bool = True,
         user_query: str = None,
-        analysis: str = None
+        analysis: str = None,
+        params: Optional[Union[tuple, dict]] = None
     ) -> Dict[str, Any]:
         """
         Execute SQL query on specified database
         
         Args:
-            sql: SQL query string
+            sql: SQL query string (may contain %s / %(name)s placeholders)
             database: "main" (January data) or "live" (current data)
-            return_format: "dict", "dataframe", or "json"
+            return_format: "dict" (row records), "columns" ({column: values}),
+                "split" (JSON with columns/data arrays), "arrow" (pyarrow.Table,
+                requires pyarrow), "dataframe", or "json"
             use_cache: Whether to use cache for this query
             user_query: Original user query (optional, for context)
             analysis: Gemini analysis of results (optional)
+            params: Values for the query placeholders (optional)
             
         Returns:
             Query results with metadata
@@ -75,12 +136,22 @@ class DatabaseExecutorTool:
                     "sql": sql
                 }
             
-            # Choose database configuration
-            db_config = self.main_db_config if database == "main" else self.live_db_config
+            if return_format == "arrow" and not PYARROW_AVAILABLE:
+                return {
+                    "status": "error",
+                    "error": "return_format='arrow' requires pyarrow",
+                    "sql": sql
+                }
+            
+            # Serve repeated queries from the cache, otherwise run on a pooled connection
+            cache_key = self._cache_key(sql, database, params) if use_cache and self.cache is not None else None
+            df = self._cache_get(cache_key)
+            cache_hit = df is not None
             
-            # Execute query
-            with psycopg2.connect(**db_config) as conn:
-                df = pd.read_sql(sql, conn)
+            if not cache_hit:
+                with self._connection(database) as conn:
+                    df = self._read_frame(conn, sql, params)
+                self._cache_set(cache_key, database, df)
             
             # Format results
             result = {
@@ -90,7 +161,7 @@ class DatabaseExecutorTool:
                 "row_count": len(df),
                 "columns": list(df.columns),
                 "execution_time": "< 1s",
-                "cache_hit": False
+                "cache_hit": cache_hit
             }
             
             # Add Gemini analysis if provided
@@ -106,6 +177,16 @@ class DatabaseExecutorTool:
                 result["data"] = df
             elif return_format == "json":
                 result["data"] = df.to_json(orient="records", date_format="iso")
+            elif return_format == "columns":
+                # Column-major: one list per column instead of a dict per row
+                result["data"] = {col: df[col].tolist() for col in df.columns}
+            elif return_format == "split":
+                # Column names once plus row arrays, serialized by pandas' C JSON writer
+                result["data"] = df.to_json(orient="split", index=False, date_format="iso")
+            elif return_format == "arrow":
+                # Columnar buffers that can be sliced and filtered without per-row objects;
+                # convert with table.to_pylist() only at a JSON boundary
+                result["data"] = pa.Table.from_pandas(df, preserve_index=False)
             else:  # dict format
                 result["data"] = df.to_dict(orient="records")
             
@@ -119,6 +200,147 @@ class DatabaseExecutorTool:
                 "database": database
             }
     
+    def _connect_cache(self) -> Optional[redis.Redis]:
+        """Connect to Redis for result caching, or return None if it is unavailable"""
+        try:
+            client = redis.Redis(
+                host=os.getenv('REDIS_HOST', 'localhost'),
+                port=int(os.getenv('REDIS_PORT', 6379)),
+                socket_connect_timeout=1,
+                retry=Retry(NoBackoff(), 0)  # Fail fast when Redis isn't running
+            )
+            client.ping()
+            return client
+        except Exception as e:
+            self.logger.warning(f"Redis cache unavailable, running without cache: {e}")
+            return None
+    
+    def _cache_key(self, sql: str, database: str, params: Optional[Union[tuple, dict]] = None) -> str:
+        """Content-addressed key from the database and whitespace-normalized SQL (plus params)"""
+        key = f"{database}|{' '.join(sql.split())}"
+        if params is not None:
+            key += "|" + json.dumps(params, sort_keys=True, default=str)
+        return "floatchat:sql:v2:" + blake2b(key.encode(), digest_size=16).hexdigest()
+    
+    def _cache_get(self, cache_key: Optional[str]) -> Optional[pd.DataFrame]:
+        """Cached DataFrame for a key, or None on a miss (cache errors count as misses)"""
+        if cache_key is None:
+            return None
+        try:
+            payload = self.cache.get(cache_key)
+            if payload is None:
+                return None
+            return pd.read_json(StringIO(payload.decode()), orient="table")
+        except Exception as e:
+            self.logger.warning(f"Cache read failed: {e}")
+            return None
+    
+    def _cache_set(self, cache_key: Optional[str], database: str, df: pd.DataFrame):
+        """Store a query result DataFrame under a key for its database's CACHE_TTL_SECONDS"""
+        if cache_key is None:
+            return
+        try:
+            # Table-schema JSON is data only (unlike pickle, nothing in Redis can run
+            # code on load) and keeps column dtypes, including datetimes
+            payload = df.to_json(orient="table", index=False, date_format="iso", double_precision=15)
+            ttl = CACHE_TTL_SECONDS["main" if database == "main" else "live"]
+            self.cache.setex(cache_key, ttl, payload)
+        except Exception as e:
+            self.logger.warning(f"Cache write failed: {e}")
+    
+    def _get_pool(self, database: str) -> ThreadedConnectionPool:
+        """Get (or create) the connection pool for a database"""
+        key = "main" if database == "main" else "live"
+        pool = self._pools.get(key)
+        if pool is None:
+            with self._pool_lock:
+                pool = self._pools.get(key)
+                if pool is None:
+                    db_config = self.main_db_config if key == "main" else self.live_db_config
+                    pool = ThreadedConnectionPool(POOL_MIN_CONNECTIONS, POOL_MAX_CONNECTIONS, **db_config)
+                    self._pools[key] = pool
+        return pool
+    
+    @contextmanager
+    def _connection(self, database: str):
+        """Borrow a pooled connection, returning it (or discarding it if broken) afterwards"""
+        pool = self._get_pool(database)
+        conn = pool.getconn()
+        try:
+            # Read-only queries; autocommit avoids leaving pooled connections idle in transaction
+            conn.autocommit = True
+            yield conn
+        finally:
+            pool.putconn(conn, close=bool(conn.closed))
+    
+    def close(self):
+        """Close all pooled connections"""
+        with self._pool_lock:
+            for pool in self._pools.values():
+                pool.closeall()
+            self._pools.clear()
+    
+    def _read_frame(self, conn, sql: str, params: Optional[Union[tuple, dict]] = None) -> pd.DataFrame:
+        """
+        Read a SELECT into a DataFrame via COPY ... TO STDOUT
+        
+        The result set is streamed as CSV and parsed by pandas' C reader, so no
+        Python tuple is built per row (as pd.read_sql does), and large outputs
+        are spooled to disk so peak memory stays close to the final DataFrame.
+        Column types come from a zero-row execution of the same query.
+        
+        ConnectorX was measured as an alternative and was ~1.6x slower on
+        14k-144k row results (it opens a connection per call, bypassing the
+        pool) and rejects some valid SELECTs (e.g. top-level UNION ALL).
+        """
+        with conn.cursor() as cur:
+            # COPY takes no bind parameters, so values are quoted client-side by psycopg2
+            if params is not None:
+                sql = cur.mogrify(sql, params).decode()
+            query = sql.strip().rstrip(';')
+            
+            # The closing parenthesis goes on its own line so a trailing "-- comment" can't swallow it
+            cur.execute(f"SELECT * FROM ({query}\n) AS q LIMIT 0")
+            columns = [(desc.name, desc.type_code) for desc in cur.description]
+            names = [name for name, _ in columns]
+        
+        # read_csv can't keep duplicate column names (e.g. SELECT ap.*, am.*)
+        if len(set(names)) != len(names):
+            return self._read_frame_chunked(conn, query, names)
+        
+        with tempfile.SpooledTemporaryFile(max_size=COPY_SPOOL_MAX_BYTES) as buf:
+            with conn.cursor() as cur:
+                cur.copy_expert(
+                    f"COPY ({query}\n) TO STDOUT WITH (FORMAT CSV, HEADER, NULL '{COPY_NULL_MARKER}')", buf
+                )
+            
+            buf.seek(0)
+            return pd.read_csv(
+                buf,
+                dtype={name: str for name, oid in columns if oid in TEXT_TYPE_OIDS},
+                parse_dates=[name for name, oid in columns if oid in DATETIME_TYPE_OIDS],
+                converters={name: COPY_BOOL_VALUES.get for name, oid in columns if oid == BOOL_TYPE_OID},
+                keep_default_na=False,
+                na_values=[COPY_NULL_MARKER]
+            )
+    
+    def _read_frame_chunked(self, conn, query: str, names: List[str]) -> pd.DataFrame:
+        """Read a query through a server-side cursor, CURSOR_FETCH_ROWS rows at a time"""
+        chunks = []
+        # withhold=True lets the named cursor live outside a transaction (autocommit)
+        with conn.cursor(name="floatchat_stream", withhold=True) as cur:
+            cur.itersize = CURSOR_FETCH_ROWS
+            cur.execute(query)
+            while True:
+                rows = cur.fetchmany(CURSOR_FETCH_ROWS)
+                if not rows:
+                    break
+                chunks.append(pd.DataFrame(rows, columns=names))
+        
+        if not chunks:
+            return pd.DataFrame(columns=names)
+        return pd.concat(chunks, ignore_index=True)
+    
     def get_profiles_by_region(
         self, 
         region: str,
@@ -127,24 +349,15 @@ class DatabaseExecutorTool:
     ) -> Dict[str, Any]:
         """Get profiles by geographic region"""
         
-        # Define region boundaries
-        regions = {
-            "Arabian Sea": {"lat": (0, 30), "lng": (50, 80)},
-            "Bay of Bengal": {"lat": (0, 30), "lng": (80, 100)},
-            "Southern Indian Ocean": {"lat": (-40, 0), "lng": (20, 120)},
-            "Northern Indian Ocean": {"lat": (30, 90), "lng": (20, 120)},
-            "Indian Ocean": {"lat": (-40, 30), "lng": (20, 120)}
-        }
-        
-        if region not in regions:
+        if region not in REGION_BOUNDS:
             return {
                 "status": "error",
-                "error": f"Unknown region: {region}. Available: {list(regions.keys())}"
+                "error": f"Unknown region: {region}. Available: {list(REGION_BOUNDS.keys())}"
             }
         
-        bounds = regions[region]
+        bounds = REGION_BOUNDS[region]
         
-        sql = f"""
+        sql = """
         SELECT 
             global_profile_id,
             float_id,
@@ -158,13 +371,14 @@ class DatabaseExecutorTool:
             institution,
             data_mode
         FROM argo_profiles
-        WHERE latitude BETWEEN {bounds['lat'][0]} AND {bounds['lat'][1]}
-          AND longitude BETWEEN {bounds['lng'][0]} AND {bounds['lng'][1]}
+        WHERE latitude BETWEEN %s AND %s
+          AND longitude BETWEEN %s AND %s
         ORDER BY datetime DESC
-        LIMIT {limit};
+        LIMIT %s;
         """
+        params = (*bounds['lat'], *bounds['lng'], int(limit))
         
-        return self.execute_query(sql, database)
+        return self.execute_query(sql, database, params=params)
     
     def get_profiles_by_float_id(
         self,
@@ -176,7 +390,7 @@ class DatabaseExecutorTool:
         """Get profiles for a specific float"""
         
         if include_measurements:
-            sql = f"""
+            sql = """
             SELECT 
                 ap.float_id,
                 ap.cycle_number,
@@ -189,21 +403,28 @@ class DatabaseExecutorTool:
                 am.salinity,
                 am.datetime AS measurement_datetime
             FROM argo_profiles ap
-            JOIN argo_measurements am ON ap.global_profile_id = am.global_profile_id
-            WHERE ap.float_id = '{float_id}'
+            -- Per-profile index scan on the (global_profile_id, level) primary key, so
+            -- only the newest profiles' measurements are read instead of sorting the join
+            CROSS JOIN LATERAL (
+                SELECT level, pressure, temperature, salinity, datetime
+                FROM argo_measurements m
+                WHERE m.global_profile_id = ap.global_profile_id
+                ORDER BY level
+            ) am
+            WHERE ap.float_id = %s
             ORDER BY ap.datetime DESC, am.level ASC
-            LIMIT {limit};
+            LIMIT %s;
             """
         else:
-            sql = f"""
+            sql = """
             SELECT *
             FROM argo_profiles
-            WHERE float_id = '{float_id}'
+            WHERE float_id = %s
             ORDER BY datetime DESC
-            LIMIT {limit};
+            LIMIT %s;
             """
         
-        return self.execute_query(sql, database)
+        return self.execute_query(sql, database, params=(str(float_id), int(limit)))
     
     def get_database_stats(self, database: str = "main") -> Dict[str, Any]:
         """Get database statistics"""
@@ -246,11 +467,14 @@ class DatabaseExecutorTool:
         if not parameters:
             parameters = ["temperature", "salinity", "pressure"]
         
-        # Build column list
-        param_cols = ", ".join([f"am.{p}" for p in parameters if p in ["temperature", "salinity", "pressure"]])
+        # Build column list: pressure is always returned, so only the other requested
+        # measurements are added (no duplicate column, no dangling comma)
+        param_cols = ", ".join(
+            ["am.pressure"] + [f"am.{p}" for p in dict.fromkeys(parameters) if p in ("temperature", "salinity")]
+        )
         
         # Build query
-        profile_ids_str = ", ".join(str(pid) for pid in profile_ids[:100])  # Limit to 100 profiles
+        profile_ids = [int(pid) for pid in profile_ids[:100]]  # Limit to 100 profiles
         
         sql = f"""
         SELECT 
@@ -260,33 +484,29 @@ class DatabaseExecutorTool:
             ap.latitude,
             ap.longitude,
             am.level,
-            am.pressure,
             {param_cols}
         FROM argo_profiles ap
         JOIN argo_measurements am ON ap.global_profile_id = am.global_profile_id
-        WHERE ap.global_profile_id IN ({profile_ids_str})
+        WHERE ap.global_profile_id = ANY(%s::bigint[])
         ORDER BY ap.datetime DESC, am.level ASC;
         """
         
-        return self.execute_query(sql, database)
+        return self.execute_query(sql, database, params=(profile_ids,))
     
     def _is_safe_query(self, sql: str) -> bool:
         """Validate SQL query for safety"""
-        sql_lower = sql.lower().strip()
+        sql_lower = sql.lower()
         
         # Must be a SELECT query
-        if not sql_lower.startswith('select'):
+        if not sql_lower.lstrip().startswith('select'):
             return False
         
-        # Check for dangerous keywords
-        dangerous_keywords = ['drop', 'delete', 'truncate', 'insert', 'update', 'alter', 'create', 'exec']
-        
-        import re
-        for keyword in dangerous_keywords:
-            if re.search(r'\b' + keyword + r'\b', sql_lower):
-                return False
+        # Substring checks run in C and clear most queries; the word-boundary regex
+        # only runs when a keyword appears somewhere (e.g. inside "created_at")
+        if not any(keyword in sql_lower for keyword in DANGEROUS_SQL_KEYWORDS):
+            return True
         
-        return True
+        return DANGEROUS_SQL_RE.search(sql_lower) is None
 
 
 def test_db_executor():
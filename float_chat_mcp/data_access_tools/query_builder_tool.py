@@ -6,7 +6,9 @@ Now powered by Google Gemini AI for dynamic SQL generation
 
 import re
 import json
-from typing import Dict, Any, List, Optional, Union
+import functools
+from types import MappingProxyType
+from typing import Dict, Any, List, Optional, Set, Tuple, Union
 from datetime import datetime, timedelta
 import logging
 import os
@@ -16,13 +18,36 @@ from pathlib import Path
 # Add parent directory to path for imports
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
-# Import Gemini SQL Generator
+
+# Optional Aho-Corasick keyword matcher (falls back to per-keyword substring checks)
 try:
-    from gemini_sql_generator import GeminiSQLGenerator
-    GEMINI_AVAILABLE = True
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
 except ImportError:
-    GEMINI_AVAILABLE = False
-    logging.warning("Gemini SQL Generator not available, falling back to hardcoded patterns")
+    AHOCORASICK_AVAILABLE = False
+
+# Entity patterns, compiled once at import
+# Float IDs: standalone 7-digit WMO numbers ("float 1234567" is covered too)
+FLOAT_ID_PATTERN = re.compile(r'\b(\d{7})\b')
+# A query that is nothing but a float ID, e.g. "1902482" or "float 1902482"
+FLOAT_ONLY_PATTERN = re.compile(r'\s*(?:argo\s+)?(?:float\s+)?(\d{7})\s*', re.IGNORECASE)
+# Coordinates like "15.5N" or "70°E"; the hemisphere letter says latitude vs longitude
+COORD_PATTERN = re.compile(r'(\d+(?:\.\d+)?)[°]?([NSEW])', re.IGNORECASE)
+YEAR_PATTERN = re.compile(r'\b(20\d{2})\b')
+
+# Distinct normalized queries whose intent analysis is memoized per builder
+INTENT_CACHE_MAX_ENTRIES = 2048
+
+# Execution strategy per query type (anything else, e.g. general_search, runs hybrid)
+QUERY_TYPE_STRATEGIES = MappingProxyType({
+    "float_lookup": "sql_only",            # Direct SQL for simple lookups
+    "semantic_analysis": "vector_only",    # Vector search for semantic queries
+    "spatial_temporal": "hybrid",          # Hybrid for complex spatial-temporal queries
+    "spatial": "sql_only",                 # SQL for simple spatial/temporal queries
+    "temporal": "sql_only",
+    "institution_analysis": "vector_only", # Vector for institution/parameter analysis
+    "parameter_analysis": "vector_only",
+})
 
 class QueryBuilderTool:
     """Intelligent query builder and router for Argo data access"""
@@ -35,19 +60,22 @@ class QueryBuilderTool:
             use_gemini: Whether to use Gemini AI for SQL generation (default: True)
         """
         self.logger = logging.getLogger(__name__)
-        self.use_gemini = use_gemini and GEMINI_AVAILABLE
+        self.use_gemini = use_gemini
+        self.gemini_generator = None
         
-        # Initialize Gemini SQL Generator if available
+        # Initialize Gemini SQL Generator if available (imported here so
+        # builders without Gemini never load the Google SDK)
         if self.use_gemini:
             try:
+                from gemini_sql_generator import GeminiSQLGenerator
                 self.gemini_generator = GeminiSQLGenerator()
                 self.logger.info("✅ Gemini SQL Generator initialized")
+            except ImportError:
+                self.logger.warning("Gemini SQL Generator not available, falling back to hardcoded patterns")
+                self.use_gemini = False
             except Exception as e:
                 self.logger.warning(f"Failed to initialize Gemini: {e}. Falling back to hardcoded patterns")
                 self.use_gemini = False
-                self.gemini_generator = None
-        else:
-            self.gemini_generator = None
         
         # Geographic regions mapping
         self.regions = {
@@ -60,57 +88,168 @@ class QueryBuilderTool:
         
         # Temporal patterns
         self.temporal_patterns = {
-            "winter": ["winter", "december", "january", "february"],
-            "spring": ["spring", "march", "april", "may"],
-            "summer": ["summer", "june", "july", "august"],
-            "autumn": ["autumn", "fall", "september", "october", "november"]
+            "winter": ("winter", "december", "january", "february"),
+            "spring": ("spring", "march", "april", "may"),
+            "summer": ("summer", "june", "july", "august"),
+            "autumn": ("autumn", "fall", "september", "october", "november")
         }
         
         # Parameter mappings
         self.parameters = {
-            "temperature": ["temperature", "temp", "thermal", "heat"],
-            "salinity": ["salinity", "salt", "saline", "psu"],
-            "pressure": ["pressure", "depth", "deep", "shallow"]
+            "temperature": ("temperature", "temp", "thermal", "heat"),
+            "salinity": ("salinity", "salt", "saline", "psu"),
+            "pressure": ("pressure", "depth", "deep", "shallow")
         }
         
         # Institution patterns
         self.institutions = {
-            "incois": ["incois", "indian national centre"],
-            "csiro": ["csiro", "commonwealth scientific"],
-            "ifremer": ["ifremer", "french research"]
+            "incois": ("incois", "indian national centre"),
+            "csiro": ("csiro", "commonwealth scientific"),
+            "ifremer": ("ifremer", "french research")
+        }
+        self._institution_names = {inst: inst.upper() for inst in self.institutions}
+        
+        # Depth term patterns
+        self.depth_keywords = {
+            "surface": ("surface", "shallow", "top"),
+            "deep": ("deep", "bottom", "abyssal"),
+            "intermediate": ("intermediate", "mid", "middle")
         }
+        
+        # Relative time patterns ("recent" takes precedence over "last_month")
+        self.relative_time_patterns = {
+            "recent": ("latest", "recent", "current", "now"),
+            "last_month": ("last month", "past month")
+        }
+        
+        # Words that mark a semantic (vector search) query
+        self.semantic_keywords = ("compare", "analyze", "pattern", "trend", "anomaly")
+        
+        # Flat keyword -> (category, canonical value) index, so every entity
+        # category is collected in one pass instead of one loop per category.
+        # Frozen once built; the tables above are its only source.
+        keyword_index: Dict[str, Tuple[Tuple[str, str], ...]] = {}
+        for key, region in self.regions.items():
+            self._index_keywords(keyword_index, "regions", region, (key,))
+        for season, keywords in self.temporal_patterns.items():
+            self._index_keywords(keyword_index, "seasons", season, keywords)
+        for param, keywords in self.parameters.items():
+            self._index_keywords(keyword_index, "parameters", param, keywords)
+        for inst, keywords in self.institutions.items():
+            self._index_keywords(keyword_index, "institutions", self._institution_names[inst], keywords)
+        for category, keywords in self.depth_keywords.items():
+            self._index_keywords(keyword_index, "depth_terms", category, keywords)
+        for relative, keywords in self.relative_time_patterns.items():
+            self._index_keywords(keyword_index, "relative_time", relative, keywords)
+        self._index_keywords(keyword_index, "query_type", "semantic_analysis", self.semantic_keywords)
+        self._keyword_index = MappingProxyType(keyword_index)
+        
+        # One automaton over all keywords reports every (overlapping) match in
+        # a single linear sweep of the query. Measured against the other DFA
+        # matchers: Hyperscan finds the same hits but is slower per query
+        # (per-match callbacks), and a single RE2 alternation is
+        # non-overlapping, so it drops "indian ocean" inside "southern indian ocean".
+        self._keyword_automaton = None
+        if AHOCORASICK_AVAILABLE:
+            self._keyword_automaton = ahocorasick.Automaton()
+            for keyword, keyword_hits in self._keyword_index.items():
+                self._keyword_automaton.add_word(keyword, keyword_hits)
+            self._keyword_automaton.make_automaton()
+        
+        # Intent analysis is deterministic on the normalized query text
+        self._analyze_normalized = functools.lru_cache(maxsize=INTENT_CACHE_MAX_ENTRIES)(
+            self._analyze_normalized
+        )
+    
+    @staticmethod
+    def _index_keywords(index: Dict[str, Tuple[Tuple[str, str], ...]], category: str,
+                        value: str, keywords: Tuple[str, ...]) -> None:
+        """Add keywords for one canonical value to a keyword index"""
+        for keyword in keywords:
+            index[keyword] = index.get(keyword, ()) + ((category, value),)
+    
+    def _scan_keywords(self, query_lower: str) -> Set[Tuple[str, str]]:
+        """Collect every (category, value) hit from a single pass over the query"""
+        # Keywords match as substrings ("temp" inside "temperatures"); a flat
+        # loop of C-level `in` checks beats one big regex alternation here
+        hits = set()
+        if self._keyword_automaton is not None:
+            for _, keyword_hits in self._keyword_automaton.iter(query_lower):
+                hits.update(keyword_hits)
+            return hits
+        
+        for keyword, keyword_hits in self._keyword_index.items():
+            if keyword in query_lower:
+                hits.update(keyword_hits)
+        return hits
     
     def analyze_intent(self, query_text: str) -> Dict[str, Any]:
         """
         Analyze user query to extract intent and entities
         
+        A query that is only a float ID ("1902482", "float 1902482") skips
+        extraction and gets a prebuilt float_lookup intent. Other repeated
+        queries (ignoring case and surrounding whitespace) are served from an
+        LRU cache, so the returned entities are shared between calls and must
+        be treated as read-only.
+        
         Args:
             query_text: Natural language query
             
         Returns:
             Intent analysis with extracted entities
         """
-        query_lower = query_text.lower()
+        # Fast path: a bare float ID is always a float lookup, and nothing
+        # else in such a query can match a keyword, year or coordinate
+        float_only = FLOAT_ONLY_PATTERN.fullmatch(query_text)
+        if float_only:
+            return self._float_lookup_intent(query_text, float_only.group(1))
+        
+        analysis = self._analyze_normalized(query_text.strip().lower())
+        return {"query_text": query_text, **analysis}
+    
+    def _float_lookup_intent(self, query_text: str, float_id: str) -> Dict[str, Any]:
+        """Intent for a query that is only a float ID, as the full pipeline would build it"""
+        entities = {
+            "regions": [],
+            "temporal": {"seasons": [], "years": [], "months": [], "relative_time": None},
+            "parameters": [],
+            "float_ids": [float_id],
+            "institutions": [],
+            "coordinates": {"lat_bounds": None, "lng_bounds": None},
+            "depth_terms": []
+        }
+        
+        return {
+            "query_text": query_text,
+            "entities": entities,
+            "query_type": "float_lookup",
+            "strategy": "sql_only",
+            "confidence": self._calculate_confidence(entities, "float_lookup")
+        }
+    
+    def _analyze_normalized(self, query_lower: str) -> Dict[str, Any]:
+        """Run the entity/type/strategy pipeline on a stripped, lowercased query"""
+        keyword_hits = self._scan_keywords(query_lower)
         
-        # Extract entities
+        # Extract entities (float ID and coordinate patterns are case-insensitive)
         entities = {
-            "regions": self._extract_regions(query_lower),
-            "temporal": self._extract_temporal(query_lower),
-            "parameters": self._extract_parameters(query_lower),
-            "float_ids": self._extract_float_ids(query_text),
-            "institutions": self._extract_institutions(query_lower),
-            "coordinates": self._extract_coordinates(query_text),
-            "depth_terms": self._extract_depth_terms(query_lower)
+            "regions": self._extract_regions(keyword_hits),
+            "temporal": self._extract_temporal(query_lower, keyword_hits),
+            "parameters": self._extract_parameters(keyword_hits),
+            "float_ids": self._extract_float_ids(query_lower),
+            "institutions": self._extract_institutions(keyword_hits),
+            "coordinates": self._extract_coordinates(query_lower),
+            "depth_terms": self._extract_depth_terms(keyword_hits)
         }
         
         # Determine query type
-        query_type = self._classify_query_type(entities, query_lower)
+        query_type = self._classify_query_type(entities, keyword_hits)
         
         # Choose execution strategy
-        strategy = self._choose_strategy(query_type, entities, query_lower)
+        strategy = self._choose_strategy(query_type, entities)
         
         return {
-            "query_text": query_text,
             "entities": entities,
             "query_type": query_type,
             "strategy": strategy,
@@ -139,15 +278,46 @@ class QueryBuilderTool:
         else:
             return self._build_fallback_plan(intent)
     
-    def _extract_regions(self, query_lower: str) -> List[str]:
+    def build_execution_plans(self, intents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Build execution plans for several intents, batching Gemini SQL generation
+        
+        SQL-only intents share one Gemini call for their SQL (results are still
+        executed and analyzed per query); everything else is planned exactly as
+        build_execution_plan would.
+        
+        Args:
+            intents: Intent analyses from analyze_intent()
+            
+        Returns:
+            One execution plan per intent, in order
+        """
+        sql_results = {}
+        if self.use_gemini and self.gemini_generator:
+            sql_positions = [i for i, intent in enumerate(intents) if intent["strategy"] == "sql_only"]
+            if len(sql_positions) > 1:
+                try:
+                    # The generator serves cached SQL itself and sends only the rest to Gemini
+                    generated = self.gemini_generator.generate_sql_queries(
+                        [intents[i]["query_text"] for i in sql_positions]
+                    )
+                    sql_results.update(zip(sql_positions, generated))
+                except Exception as e:
+                    self.logger.error(f"❌ Batch Gemini SQL generation failed: {e}, generating per query")
+        
+        plans = []
+        for i, intent in enumerate(intents):
+            if i in sql_results:
+                plans.append(self._build_sql_plan(intent["entities"], intent, sql_results[i]))
+            else:
+                plans.append(self.build_execution_plan(intent))
+        return plans
+    
+    def _extract_regions(self, keyword_hits: Set[Tuple[str, str]]) -> List[str]:
         """Extract geographic regions from query"""
-        found_regions = []
-        for key, region in self.regions.items():
-            if key in query_lower:
-                found_regions.append(region)
-        return found_regions
+        return [region for region in self.regions.values() if ("regions", region) in keyword_hits]
     
-    def _extract_temporal(self, query_lower: str) -> Dict[str, Any]:
+    def _extract_temporal(self, query_lower: str, keyword_hits: Set[Tuple[str, str]]) -> Dict[str, Any]:
         """Extract temporal information from query"""
         temporal_info = {
             "seasons": [],
@@ -157,63 +327,46 @@ class QueryBuilderTool:
         }
         
         # Extract seasons
-        for season, keywords in self.temporal_patterns.items():
-            if any(keyword in query_lower for keyword in keywords):
-                temporal_info["seasons"].append(season)
+        temporal_info["seasons"] = [
+            season for season in self.temporal_patterns if ("seasons", season) in keyword_hits
+        ]
         
         # Extract years
-        year_matches = re.findall(r'\b(20\d{2})\b', query_lower)
+        year_matches = YEAR_PATTERN.findall(query_lower)
         temporal_info["years"] = [int(year) for year in year_matches]
         
         # Extract relative time
-        if any(word in query_lower for word in ["latest", "recent", "current", "now"]):
-            temporal_info["relative_time"] = "recent"
-        elif any(word in query_lower for word in ["last month", "past month"]):
-            temporal_info["relative_time"] = "last_month"
+        for relative in self.relative_time_patterns:
+            if ("relative_time", relative) in keyword_hits:
+                temporal_info["relative_time"] = relative
+                break
         
         return temporal_info
     
-    def _extract_parameters(self, query_lower: str) -> List[str]:
+    def _extract_parameters(self, keyword_hits: Set[Tuple[str, str]]) -> List[str]:
         """Extract oceanographic parameters from query"""
-        found_params = []
-        for param, keywords in self.parameters.items():
-            if any(keyword in query_lower for keyword in keywords):
-                found_params.append(param)
-        return found_params
+        return [param for param in self.parameters if ("parameters", param) in keyword_hits]
     
     def _extract_float_ids(self, query_text: str) -> List[str]:
         """Extract float IDs from query"""
         # Look for patterns like "float 1234567" or "1234567"
-        float_patterns = [
-            r'float\s+(\d{7})',
-            r'\b(\d{7})\b'
-        ]
-        
-        float_ids = []
-        for pattern in float_patterns:
-            matches = re.findall(pattern, query_text, re.IGNORECASE)
-            float_ids.extend(matches)
+        float_ids = FLOAT_ID_PATTERN.findall(query_text)
         
-        return list(set(float_ids))  # Remove duplicates
+        return list(dict.fromkeys(float_ids))  # Remove duplicates
     
-    def _extract_institutions(self, query_lower: str) -> List[str]:
+    def _extract_institutions(self, keyword_hits: Set[Tuple[str, str]]) -> List[str]:
         """Extract institutions from query"""
-        found_institutions = []
-        for inst, keywords in self.institutions.items():
-            if any(keyword in query_lower for keyword in keywords):
-                found_institutions.append(inst.upper())
-        return found_institutions
+        return [name for name in self._institution_names.values() if ("institutions", name) in keyword_hits]
     
     def _extract_coordinates(self, query_text: str) -> Dict[str, Any]:
         """Extract coordinate information from query"""
         coords = {"lat_bounds": None, "lng_bounds": None}
         
-        # Look for coordinate patterns
-        lat_pattern = r'(\d+(?:\.\d+)?)[°]?[NS]'
-        lng_pattern = r'(\d+(?:\.\d+)?)[°]?[EW]'
-        
-        lat_matches = re.findall(lat_pattern, query_text, re.IGNORECASE)
-        lng_matches = re.findall(lng_pattern, query_text, re.IGNORECASE)
+        # Look for coordinate patterns (one scan for both axes)
+        lat_matches = []
+        lng_matches = []
+        for value, hemisphere in COORD_PATTERN.findall(query_text):
+            (lat_matches if hemisphere in "NSns" else lng_matches).append(value)
         
         if lat_matches:
             coords["lat_bounds"] = [float(lat) for lat in lat_matches]
@@ -222,22 +375,11 @@ class QueryBuilderTool:
         
         return coords
     
-    def _extract_depth_terms(self, query_lower: str) -> List[str]:
+    def _extract_depth_terms(self, keyword_hits: Set[Tuple[str, str]]) -> List[str]:
         """Extract depth-related terms"""
-        depth_terms = []
-        depth_keywords = {
-            "surface": ["surface", "shallow", "top"],
-            "deep": ["deep", "bottom", "abyssal"],
-            "intermediate": ["intermediate", "mid", "middle"]
-        }
-        
-        for category, keywords in depth_keywords.items():
-            if any(keyword in query_lower for keyword in keywords):
-                depth_terms.append(category)
-        
-        return depth_terms
+        return [category for category in self.depth_keywords if ("depth_terms", category) in keyword_hits]
     
-    def _classify_query_type(self, entities: Dict[str, Any], query_lower: str) -> str:
+    def _classify_query_type(self, entities: Dict[str, Any], keyword_hits: Set[Tuple[str, str]]) -> str:
         """Classify the type of query based on entities"""
         
         # Specific float lookup
@@ -263,36 +405,15 @@ class QueryBuilderTool:
             return "institution_analysis"
         
         # Semantic/complex queries
-        if any(word in query_lower for word in ["compare", "analyze", "pattern", "trend", "anomaly"]):
+        if ("query_type", "semantic_analysis") in keyword_hits:
             return "semantic_analysis"
         
         return "general_search"
     
-    def _choose_strategy(self, query_type: str, entities: Dict[str, Any], query_lower: str) -> str:
+    def _choose_strategy(self, query_type: str, entities: Dict[str, Any]) -> str:
         """Choose execution strategy based on query type and complexity"""
-        
-        # Direct SQL for simple lookups
-        if query_type == "float_lookup":
-            return "sql_only"
-        
-        # Vector search for semantic queries
-        if query_type == "semantic_analysis":
-            return "vector_only"
-        
-        # Hybrid for complex spatial-temporal queries
-        if query_type == "spatial_temporal":
-            return "hybrid"
-        
-        # SQL for simple spatial/temporal queries
-        if query_type in ["spatial", "temporal"]:
-            return "sql_only"
-        
-        # Vector for institution/parameter analysis
-        if query_type in ["institution_analysis", "parameter_analysis"]:
-            return "vector_only"
-        
         # Default to hybrid for general searches
-        return "hybrid"
+        return QUERY_TYPE_STRATEGIES.get(query_type, "hybrid")
     
     def _calculate_confidence(self, entities: Dict[str, Any], query_type: str) -> float:
         """Calculate confidence score for the intent analysis"""
@@ -310,8 +431,14 @@ class QueryBuilderTool:
         
         return min(confidence, 1.0)
     
-    def _build_sql_plan(self, entities: Dict[str, Any], intent: Dict[str, Any]) -> Dict[str, Any]:
-        """Build SQL-only execution plan using Gemini AI or fallback to hardcoded patterns"""
+    def _build_sql_plan(self, entities: Dict[str, Any], intent: Dict[str, Any],
+                        sql_result: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Build SQL-only execution plan using Gemini AI or fallback to hardcoded patterns
+        
+        sql_result is Gemini SQL already generated for this intent (see
+        build_execution_plans); without it the SQL is generated here (the
+        generator caches it per normalized query).
+        """
         
         plan = {
             "strategy": "sql_only",
@@ -326,8 +453,12 @@ class QueryBuilderTool:
             try:
                 self.logger.info("🧠 Using Gemini AI to generate SQL query")
                 
+                # Generated SQL is cached by the generator, so this only calls Gemini for new queries
+                if sql_result is None:
+                    sql_result = self.gemini_generator.generate_sql_query(intent["query_text"])
+                
                 # Use the full query_and_execute method to get SQL + analysis
-                gemini_result = self.gemini_generator.query_and_execute(intent["query_text"])
+                gemini_result = self.gemini_generator.query_and_execute(intent["query_text"], sql_result)
                 
                 if gemini_result["status"] == "success" and gemini_result["validation"]["is_safe"]:
                     # Extract execution results
@@ -392,10 +523,8 @@ class QueryBuilderTool:
         
         return plan
     
-    def _build_vector_plan(self, entities: Dict[str, Any], intent: Dict[str, Any]) -> Dict[str, Any]:
-        """Build vector-only execution plan"""
-        
-        # Generate semantic query
+    def _make_semantic_query(self, entities: Dict[str, Any], intent: Dict[str, Any]) -> str:
+        """Build the semantic search text shared by the vector and hybrid plans"""
         query_parts = []
         
         if entities["parameters"]:
@@ -410,12 +539,15 @@ class QueryBuilderTool:
         if entities["depth_terms"]:
             query_parts.extend([f"{term} water" for term in entities["depth_terms"]])
         
-        semantic_query = " ".join(query_parts) if query_parts else intent["query_text"]
+        return " ".join(query_parts) if query_parts else intent["query_text"]
+    
+    def _build_vector_plan(self, entities: Dict[str, Any], intent: Dict[str, Any]) -> Dict[str, Any]:
+        """Build vector-only execution plan"""
         
         return {
             "strategy": "vector_only",
             "collection": "january",
-            "query": semantic_query,
+            "query": self._make_semantic_query(entities, intent),
             "n_results": 20,
             "filters": self._build_vector_filters(entities)
         }
@@ -429,7 +561,7 @@ class QueryBuilderTool:
                 {
                     "step": 1,
                     "type": "vector_search",
-                    "query": self._build_vector_plan(entities, intent)["query"],
+                    "query": self._make_semantic_query(entities, intent),
                     "n_results": 50
                 },
                 {
@@ -5,11 +5,17 @@ Note: This is a stub implementation - Redis integration can be added later
 """
 
 import logging
+import threading
+import time
+from collections import OrderedDict, deque
 from typing import Dict, Any, List, Optional
-import json
 import hashlib
+import itertools
 from datetime import datetime
 
+# Least recently used results are evicted beyond this many entries
+CACHE_MAX_ENTRIES = 4096
+
 class RedisCacheManager:
     """Cache manager for query results (stub implementation)"""
     
@@ -23,9 +29,11 @@ class RedisCacheManager:
         self.enabled = enabled
         self.logger = logging.getLogger(__name__)
         
-        # In-memory cache as fallback (not persistent)
-        self._memory_cache = {}
-        self._query_history = []
+        # In-memory LRU cache as fallback (not persistent): key -> (expires_at, result)
+        self._memory_cache = OrderedDict()
+        self._max_entries = CACHE_MAX_ENTRIES
+        self._cache_lock = threading.Lock()
+        self._query_history = deque(maxlen=100)  # Keeps only the last 100 queries
         
         if enabled:
             self.logger.info("📦 Cache Manager initialized (in-memory mode)")
@@ -50,13 +58,24 @@ class RedisCacheManager:
         cache_key = self._generate_cache_key(query, params)
         
         # Check in-memory cache
-        if cache_key in self._memory_cache:
-            cached_data = self._memory_cache[cache_key]
+        cached_data = None
+        with self._cache_lock:
+            entry = self._memory_cache.get(cache_key)
+            if entry is not None:
+                expires_at, cached_data = entry
+                if time.monotonic() > expires_at:
+                    # Expired entries are dropped lazily on access
+                    del self._memory_cache[cache_key]
+                    cached_data = None
+                else:
+                    self._memory_cache.move_to_end(cache_key)
+        
+        if cached_data is not None:
             self.logger.info(f"✅ Cache HIT for key: {cache_key[:16]}...")
             
-            # Add cache_hit flag
+            # Add cache_hit flag on a shallow copy so the stored entry stays clean
             if isinstance(cached_data, dict):
-                cached_data['cache_hit'] = True
+                return {**cached_data, 'cache_hit': True}
             
             return cached_data
         
@@ -71,7 +90,7 @@ class RedisCacheManager:
             query: SQL query or search query
             result: Query result to cache
             params: Additional parameters
-            ttl: Time to live in seconds (not implemented in memory cache)
+            ttl: Time to live in seconds
         """
         if not self.enabled:
             return
@@ -79,21 +98,39 @@ class RedisCacheManager:
         # Generate cache key
         cache_key = self._generate_cache_key(query, params)
         
-        # Store in memory cache
-        self._memory_cache[cache_key] = result
+        # Store in memory cache, evicting the least recently used entries
+        with self._cache_lock:
+            self._memory_cache[cache_key] = (time.monotonic() + ttl, result)
+            self._memory_cache.move_to_end(cache_key)
+            while len(self._memory_cache) > self._max_entries:
+                self._memory_cache.popitem(last=False)
+            
+            self._append_history(query, cache_key)
+        
+        self.logger.debug(f"💾 Cached result for key: {cache_key[:16]}...")
+    
+    def record_query(self, query: str, params: Dict[str, Any] = None):
+        """
+        Add a query to the recent-queries history without caching a result
         
-        # Add to query history
+        Args:
+            query: SQL query or search query
+            params: Additional parameters
+        """
+        if not self.enabled:
+            return
+        
+        cache_key = self._generate_cache_key(query, params)
+        with self._cache_lock:
+            self._append_history(query, cache_key)
+    
+    def _append_history(self, query: str, cache_key: str):
+        """Add a query history entry (caller holds _cache_lock, so get_recent_queries can snapshot it)"""
         self._query_history.append({
             'query': query,
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': time.time(),  # Formatted lazily in get_recent_queries
             'cache_key': cache_key
         })
-        
-        # Keep only last 100 queries in history
-        if len(self._query_history) > 100:
-            self._query_history = self._query_history[-100:]
-        
-        self.logger.debug(f"💾 Cached result for key: {cache_key[:16]}...")
     
     def invalidate_cache(self, query: str = None, params: Dict[str, Any] = None):
         """
@@ -108,13 +145,15 @@ class RedisCacheManager:
         
         if query is None:
             # Clear all cache
-            self._memory_cache.clear()
+            with self._cache_lock:
+                self._memory_cache.clear()
             self.logger.info("🗑️ Cleared all cache")
         else:
             # Clear specific query
             cache_key = self._generate_cache_key(query, params)
-            if cache_key in self._memory_cache:
-                del self._memory_cache[cache_key]
+            with self._cache_lock:
+                removed = self._memory_cache.pop(cache_key, None) is not None
+            if removed:
                 self.logger.info(f"🗑️ Invalidated cache for key: {cache_key[:16]}...")
     
     def get_recent_queries(self, limit: int = 10) -> List[Dict[str, Any]]:
@@ -127,7 +166,16 @@ class RedisCacheManager:
         Returns:
             List of recent queries with metadata
         """
-        return self._query_history[-limit:]
+        # Snapshot the newest entries under the lock (cache_result appends from
+        # worker threads), then format them outside it
+        with self._cache_lock:
+            newest_first = list(itertools.islice(reversed(self._query_history), max(limit, 0)))
+        recent = [
+            {**entry, 'timestamp': datetime.fromtimestamp(entry['timestamp']).isoformat()}
+            for entry in newest_first
+        ]
+        recent.reverse()  # Oldest first, as before
+        return recent
     
     def get_cache_stats(self) -> Dict[str, Any]:
         """
@@ -140,6 +188,7 @@ class RedisCacheManager:
             'enabled': self.enabled,
             'cache_type': 'in-memory',
             'cached_items': len(self._memory_cache),
+            'max_items': self._max_entries,
             'query_history_size': len(self._query_history),
             'note': 'Using in-memory cache. For production, consider Redis integration.'
         }
@@ -155,16 +204,16 @@ class RedisCacheManager:
         Returns:
             Cache key (hash)
         """
-        # Combine query and params into a single string
-        cache_string = query
+        # Feed query and params straight into the hash; sorted keys keep it
+        # order-independent, and the separators keep fields from running together
+        key_hash = hashlib.blake2b(query.encode(), digest_size=16)
         
         if params:
-            # Sort params for consistent hashing
-            sorted_params = json.dumps(params, sort_keys=True)
-            cache_string += sorted_params
+            for name in sorted(params):
+                key_hash.update(f"\x00{name}\x00{params[name]!r}".encode())
         
-        # Generate SHA256 hash
-        return hashlib.sha256(cache_string.encode()).hexdigest()
+        # 128-bit BLAKE2b: ample for an in-process cache and faster than SHA-256
+        return key_hash.hexdigest()
 
 
 def test_cache_manager():
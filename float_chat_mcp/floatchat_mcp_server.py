@@ -5,26 +5,51 @@ Using FastMCP for simplicity
 """
 
 import sys
+import asyncio
 from pathlib import Path
 
-# Add parent directory to path
-sys.path.append(str(Path(__file__).parent.parent))
+# Add project root to path (locate the package first when run as a script)
+try:
+    from float_chat_mcp._paths import ensure_on_syspath
+except ImportError:
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+    from float_chat_mcp._paths import ensure_on_syspath
+ensure_on_syspath()
 
+import orjson
 from fastmcp import FastMCP
 
 # Import your enhanced data access tools
-from float_chat_mcp.data_access_tools.data_access_orchestrator import DataAccessOrchestrator
-from float_chat_mcp.data_access_tools.redis_cache_manager import RedisCacheManager
+from float_chat_mcp._singletons import get_orchestrator, get_cache_manager
 
-# Initialize tools
-orchestrator = DataAccessOrchestrator(use_gemini=True, enable_cache=True)
-cache_manager = RedisCacheManager(enabled=True)
+# Initialize tools (shared with anything else in this process)
+orchestrator = get_orchestrator()
+cache_manager = get_cache_manager()
 
-# Create FastMCP server
-mcp = FastMCP("FloatChat Data Access")
+def _orjson_serializer(result) -> str:
+    """Serialize tool results with orjson (numpy arrays/scalars included, anything else via str)"""
+    return orjson.dumps(
+        result,
+        option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+        default=str
+    ).decode()
+
+# Create FastMCP server; large execute_query payloads go through orjson instead of
+# FastMCP's default encoder (which it still falls back to if orjson raises)
+mcp = FastMCP("FloatChat Data Access", tool_serializer=_orjson_serializer)
+
+def _execute_query_recorded(query: str) -> dict:
+    """Blocking part of execute_query: orchestrator run plus a query history entry"""
+    # The orchestrator caches repeated queries itself; only the history is kept here
+    result = orchestrator.execute_query(query)
+    cache_manager.record_query(" ".join(query.split()))
+    return result
+
+# Tools are async so overlapping agent calls don't serialise on the event loop;
+# blocking Gemini/DB/vector work runs in a worker thread via asyncio.to_thread
 
 @mcp.tool()
-def execute_query(query: str) -> dict:
+async def execute_query(query: str) -> dict:
     """
     Execute a natural language query about Argo float data.
     Uses Gemini AI to understand the query and generate SQL.
@@ -36,11 +61,14 @@ def execute_query(query: str) -> dict:
     Returns:
         Query results with metadata
     """
-    result = orchestrator.execute_query(query)
-    return result
+    # Empty queries are rejected here, before the thread hop
+    if not query or query.isspace():
+        return {"status": "error", "strategy": "none", "results": [], "error": "empty query"}
+    
+    return await asyncio.to_thread(_execute_query_recorded, query)
 
 @mcp.tool()
-def get_recent_queries(limit: int = 10) -> list:
+async def get_recent_queries(limit: int = 10) -> list:
     """
     Get list of recent queries executed by users.
     Useful for showing query history in dashboard.
@@ -51,11 +79,12 @@ def get_recent_queries(limit: int = 10) -> list:
     Returns:
         List of recent query information
     """
+    # In-memory lookup, cheap enough to run on the event loop
     recent = cache_manager.get_recent_queries(limit=limit)
     return recent
 
 @mcp.tool()
-def get_system_status() -> dict:
+async def get_system_status() -> dict:
     """
     Get status of all system components.
     Includes Gemini AI, Redis cache, databases, and vector store status.
@@ -63,11 +92,11 @@ def get_system_status() -> dict:
     Returns:
         System status information
     """
-    status = orchestrator.get_system_status()
+    status = await asyncio.to_thread(orchestrator.get_system_status)
     return status
 
 @mcp.tool()
-def get_cache_stats() -> dict:
+async def get_cache_stats() -> dict:
     """
     Get Redis cache statistics.
     Shows cached queries count, memory usage, and performance metrics.
@@ -78,6 +107,25 @@ def get_cache_stats() -> dict:
     stats = cache_manager.get_cache_stats()
     return stats
 
+@mcp.tool()
+async def get_dashboard_snapshot(limit: int = 10) -> dict:
+    """
+    Get recent queries, system status and cache statistics in one call.
+    Saves dashboards three separate tool round trips.
+    
+    Args:
+        limit: Maximum number of recent queries to include (default: 10)
+    
+    Returns:
+        Dictionary with recent_queries, system_status and cache_stats
+    """
+    system_status = await asyncio.to_thread(orchestrator.get_system_status)
+    return {
+        "recent_queries": cache_manager.get_recent_queries(limit=limit),
+        "system_status": system_status,
+        "cache_stats": cache_manager.get_cache_stats()
+    }
+
 if __name__ == "__main__":
     print("🚀 Starting FloatChat MCP Server (FastMCP)")
     print("📊 Tools available:")
@@ -85,6 +133,7 @@ if __name__ == "__main__":
     print("   - get_recent_queries")
     print("   - get_system_status")
     print("   - get_cache_stats")
+    print("   - get_dashboard_snapshot")
     print("\n✅ Server ready for agent connections")
     
     # Run the server
@@ -4,23 +4,33 @@ Tests the server by calling tools directly
 """
 
 import sys
+import io
 from pathlib import Path
+from types import MappingProxyType
 
-# Add paths
-sys.path.insert(0, str(Path(__file__).parent.parent))
-sys.path.insert(0, str(Path(__file__).parent))
+# Add project root to path (locate the package first when run as a script)
+try:
+    from float_chat_mcp._paths import ensure_on_syspath
+except ImportError:
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+    from float_chat_mcp._paths import ensure_on_syspath
+ensure_on_syspath()
 
 # Import the data access tools directly for testing
-from data_access_tools.data_access_orchestrator import DataAccessOrchestrator
-from data_access_tools.redis_cache_manager import RedisCacheManager
+from float_chat_mcp._singletons import get_orchestrator, get_cache_manager
 
-# Initialize tools
-orchestrator = DataAccessOrchestrator(use_gemini=True, enable_cache=True)
-cache_manager = RedisCacheManager(enabled=True)
+# Initialize tools (the same shared instances the MCP server uses)
+orchestrator = get_orchestrator()
+cache_manager = get_cache_manager()
+
+# Shared read-only default for missing sections (no new dict per miss)
+_EMPTY = MappingProxyType({})
 
 # Wrapper functions (same as MCP server)
 def execute_query(query: str):
-    return orchestrator.execute_query(query)
+    result = orchestrator.execute_query(query)
+    cache_manager.record_query(" ".join(query.split()))
+    return result
 
 def get_recent_queries(limit: int = 10):
     return cache_manager.get_recent_queries(limit=limit)
@@ -31,66 +41,86 @@ def get_system_status():
 def get_cache_stats():
     return cache_manager.get_cache_stats()
 
+def get_dashboard_snapshot(limit: int = 10):
+    return {
+        "recent_queries": cache_manager.get_recent_queries(limit=limit),
+        "system_status": orchestrator.get_system_status(),
+        "cache_stats": cache_manager.get_cache_stats()
+    }
+
 def test_mcp_tools():
     """Test all MCP tools"""
     
     print("🧪 Testing FloatChat MCP Server Tools\n")
     print("=" * 60)
     
+    # Each section is written to stdout in one go
+    buf = io.StringIO()
+    
     # Test 1: Execute Query
-    print("\n📋 Test 1: Execute Natural Language Query")
-    print("-" * 60)
+    print("\n📋 Test 1: Execute Natural Language Query", file=buf)
+    print("-" * 60, file=buf)
     query = "Show me data from float 1902482"
-    print(f"Query: '{query}'")
+    print(f"Query: '{query}'", file=buf)
     
     try:
         result = execute_query(query)
-        print(f"✅ Status: {result.get('status', 'unknown')}")
-        print(f"📊 Strategy: {result.get('strategy', 'unknown')}")
+        print(f"✅ Status: {result.get('status', 'unknown')}", file=buf)
+        print(f"📊 Strategy: {result.get('strategy', 'unknown')}", file=buf)
         if 'results' in result:
-            print(f"📈 Results: {len(result['results'])} datasets")
+            print(f"📈 Results: {len(result['results'])} datasets", file=buf)
+    except Exception as e:
+        print(f"❌ Error: {e}", file=buf)
+    sys.stdout.write(buf.getvalue())
+    
+    # Tests 2-4 read one dashboard snapshot (a single tool call on the server)
+    buf = io.StringIO()
+    try:
+        snapshot = get_dashboard_snapshot(limit=5)
     except Exception as e:
-        print(f"❌ Error: {e}")
+        print(f"\n❌ Dashboard snapshot error: {e}", file=buf)
+        snapshot = {}
     
     # Test 2: Get Recent Queries
-    print("\n📋 Test 2: Get Recent Queries")
-    print("-" * 60)
+    print("\n📋 Test 2: Get Recent Queries", file=buf)
+    print("-" * 60, file=buf)
     
     try:
-        recent = get_recent_queries(limit=5)
-        print(f"✅ Found {len(recent)} recent queries")
+        recent = snapshot["recent_queries"]
+        print(f"✅ Found {len(recent)} recent queries", file=buf)
         for i, q in enumerate(recent[:3], 1):
-            print(f"   {i}. {q.get('query', 'N/A')[:50]}...")
+            print(f"   {i}. {q.get('query', 'N/A')[:50]}...", file=buf)
     except Exception as e:
-        print(f"❌ Error: {e}")
+        print(f"❌ Error: {e}", file=buf)
     
     # Test 3: Get System Status
-    print("\n📋 Test 3: Get System Status")
-    print("-" * 60)
+    print("\n📋 Test 3: Get System Status", file=buf)
+    print("-" * 60, file=buf)
     
     try:
-        status = get_system_status()
-        print(f"✅ Overall Status: {status.get('status', 'unknown').upper()}")
+        status = snapshot["system_status"]
+        print(f"✅ Overall Status: {status.get('status', 'unknown').upper()}", file=buf)
         
-        components = status.get('components', {})
+        components = status.get('components', _EMPTY)
         for component, info in components.items():
             comp_status = info.get('status', 'unknown')
-            print(f"   {component}: {comp_status.upper()}")
+            print(f"   {component}: {comp_status.upper()}", file=buf)
     except Exception as e:
-        print(f"❌ Error: {e}")
+        print(f"❌ Error: {e}", file=buf)
     
     # Test 4: Get Cache Stats
-    print("\n📋 Test 4: Get Cache Statistics")
-    print("-" * 60)
+    print("\n📋 Test 4: Get Cache Statistics", file=buf)
+    print("-" * 60, file=buf)
     
     try:
-        stats = get_cache_stats()
-        print(f"✅ Cache Status: {stats.get('status', 'unknown')}")
+        stats = snapshot["cache_stats"]
+        print(f"✅ Cache Status: {stats.get('status', 'unknown')}", file=buf)
         if stats.get('enabled'):
-            print(f"   Cached queries: {stats.get('cached_queries', 0)}")
-            print(f"   Memory used: {stats.get('memory_used', 'N/A')}")
+            print(f"   Cached queries: {stats.get('cached_queries', 0)}", file=buf)
+            print(f"   Memory used: {stats.get('memory_used', 'N/A')}", file=buf)
     except Exception as e:
-        print(f"❌ Error: {e}")
+        print(f"❌ Error: {e}", file=buf)
+    sys.stdout.write(buf.getvalue())
     
     print("\n" + "=" * 60)
     print("✅ All tests complete!")
@@ -6,14 +6,55 @@ Uses Google Gemini AI to understand user intent and generate SQL queries dynamic
 import os
 import google.generativeai as genai
 from dotenv import load_dotenv
-import psycopg2
-import pandas as pd
+from psycopg2.extensions import DECIMAL, new_type, register_type
+from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool
 import json
-from typing import Dict, Any, Optional
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, List, Optional
 
 # Load environment variables
 load_dotenv()
 
+# Connections kept open for schema lookups and generated-query execution
+POOL_MIN_CONNECTIONS = 1
+POOL_MAX_CONNECTIONS = 16
+
+# Generated-query rows fetched per round trip from the server-side cursor
+CURSOR_FETCH_ROWS = 2000
+
+# NUMERIC columns as floats rather than Decimal (JSON-friendly, summarized as numbers)
+DECIMAL_AS_FLOAT = new_type(
+    DECIMAL.values, 'DECIMAL_AS_FLOAT',
+    lambda value, cur: float(value) if value is not None else None
+)
+
+# Generated SQL kept per generator, keyed by normalized query text (least recently used
+# evicted); reused for a day, since only the SQL is cached and results still run fresh
+SQL_CACHE_MAX_ENTRIES = 1024
+SQL_CACHE_TTL_SECONDS = 86400
+
+# Schema prompt text is reused across processes; the overview aggregate scans argo_profiles
+SCHEMA_CACHE_PATH = Path(os.getenv('FLOATCHAT_CACHE_DIR', Path.home() / '.cache' / 'floatchat')) / 'schema.json'
+SCHEMA_CACHE_TTL_SECONDS = 6 * 3600
+
+# Schema text already loaded in this process, keyed by (host, port, database)
+_schema_memo = {}
+_schema_memo_lock = threading.Lock()
+
+# Separates the per-query answers in a batch SQL response ("-- QUERY 2")
+BATCH_QUERY_MARKER = re.compile(r'^\s*--\s*QUERY\s+(\d+)\s*$', re.MULTILINE | re.IGNORECASE)
+
+# Keywords that make generated SQL unsafe; word boundaries avoid false positives like "created_at"
+DANGEROUS_SQL_KEYWORDS = ('drop', 'delete', 'truncate', 'insert', 'update', 'alter', 'create')
+DANGEROUS_SQL_RE = re.compile(r'\b(?:' + '|'.join(DANGEROUS_SQL_KEYWORDS) + r')\b')
+
 class GeminiSQLGenerator:
     """AI-powered SQL query generator using Gemini"""
     
@@ -32,13 +73,95 @@ class GeminiSQLGenerator:
             'database': os.getenv('DB_NAME')
         }
         
+        # Connection pool is created lazily, on the first query
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        
+        # Repeated queries skip the Gemini round trip (the prompt prefix is fixed per
+        # instance): normalized query -> (expires_at, result)
+        self._sql_cache = OrderedDict()
+        self._sql_cache_lock = threading.Lock()
+        
         # Get database schema
         self.schema_info = self._get_database_schema()
         
+        # Schema, rules and examples are the same for every request; built once here
+        self._prompt_prefix = self._sql_prompt_context()
+        
+    def _get_pool(self) -> ThreadedConnectionPool:
+        """Get (or create) the connection pool"""
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadedConnectionPool(POOL_MIN_CONNECTIONS, POOL_MAX_CONNECTIONS, **self.db_config)
+        return self._pool
+    
+    @contextmanager
+    def _connection(self):
+        """Borrow a pooled connection, returning it (or discarding it if broken) afterwards"""
+        pool = self._get_pool()
+        conn = pool.getconn()
+        try:
+            # Read-only queries; autocommit avoids leaving pooled connections idle in transaction
+            conn.autocommit = True
+            yield conn
+        finally:
+            pool.putconn(conn, close=bool(conn.closed))
+    
+    def close(self):
+        """Close all pooled connections"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.closeall()
+                self._pool = None
+    
     def _get_database_schema(self) -> str:
-        """Get database schema information for Gemini context"""
+        """Get database schema information for Gemini context (memoized per process and on disk)"""
+        key = f"{self.db_config['host']}:{self.db_config['port']}/{self.db_config['database']}"
+        
+        with _schema_memo_lock:
+            schema_text = _schema_memo.get(key)
+            if schema_text is None:
+                schema_text = self._load_cached_schema(key)
+            if schema_text is None:
+                schema_text = self._query_database_schema()
+                if schema_text.startswith("Error getting schema"):
+                    return schema_text  # Don't cache failures
+                self._store_cached_schema(key, schema_text)
+            _schema_memo[key] = schema_text
+        
+        return schema_text
+    
+    def _load_cached_schema(self, key: str) -> Optional[str]:
+        """Schema text from the on-disk cache, if present and younger than the TTL"""
+        try:
+            entry = json.loads(SCHEMA_CACHE_PATH.read_text()).get(key)
+        except (OSError, ValueError):
+            return None
+        if not entry or time.time() - entry.get("stored_at", 0) > SCHEMA_CACHE_TTL_SECONDS:
+            return None
+        return entry.get("schema_text")
+    
+    def _store_cached_schema(self, key: str, schema_text: str):
+        """Write schema text to the on-disk cache (best effort, replaced atomically)"""
+        try:
+            try:
+                cache = json.loads(SCHEMA_CACHE_PATH.read_text())
+            except (OSError, ValueError):
+                cache = {}
+            cache[key] = {"stored_at": time.time(), "schema_text": schema_text}
+            
+            SCHEMA_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = SCHEMA_CACHE_PATH.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_text(json.dumps(cache))
+            os.replace(tmp_path, SCHEMA_CACHE_PATH)
+        except OSError:
+            pass
+    
+    def _query_database_schema(self) -> str:
+        """Build the schema and data overview text from the database"""
         try:
-            with psycopg2.connect(**self.db_config) as conn:
+            with self._connection() as conn:
                 # Get table structures
                 schema_query = """
                 SELECT 
@@ -52,17 +175,20 @@ class GeminiSQLGenerator:
                 ORDER BY table_name, ordinal_position;
                 """
                 
-                df = pd.read_sql(schema_query, conn)
+                with conn.cursor() as cur:
+                    cur.execute(schema_query)
+                    columns_by_table = {'argo_profiles': [], 'argo_measurements': []}
+                    for table_name, column_name, data_type, is_nullable in cur:
+                        columns_by_table[table_name].append((column_name, data_type, is_nullable))
                 
                 # Format schema for Gemini
                 schema_text = "DATABASE SCHEMA:\n\n"
                 
-                for table in ['argo_profiles', 'argo_measurements']:
-                    table_cols = df[df['table_name'] == table]
+                for table, table_cols in columns_by_table.items():
                     schema_text += f"Table: {table}\n"
-                    for _, row in table_cols.iterrows():
-                        nullable = "NULL" if row['is_nullable'] == 'YES' else "NOT NULL"
-                        schema_text += f"  - {row['column_name']}: {row['data_type']} ({nullable})\n"
+                    for column_name, data_type, is_nullable in table_cols:
+                        nullable = "NULL" if is_nullable == 'YES' else "NOT NULL"
+                        schema_text += f"  - {column_name}: {data_type} ({nullable})\n"
                     schema_text += "\n"
                 
                 # Add sample data context
@@ -79,8 +205,10 @@ class GeminiSQLGenerator:
                 FROM argo_profiles;
                 """
                 
-                sample_df = pd.read_sql(sample_query, conn)
-                sample_info = sample_df.iloc[0]
+                with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                    register_type(DECIMAL_AS_FLOAT, cur)
+                    cur.execute(sample_query)
+                    sample_info = cur.fetchone()
                 
                 schema_text += "DATA OVERVIEW:\n"
                 schema_text += f"- Total profiles: {sample_info['total_profiles']}\n"
@@ -111,10 +239,63 @@ class GeminiSQLGenerator:
         Returns:
             Dictionary with generated SQL and metadata
         """
+        cached = self._cached_sql(user_query)
+        if cached is not None:
+            return cached
         
         # Create comprehensive prompt for Gemini
         prompt = f"""
-You are an expert SQL query generator for oceanographic Argo float data. 
+{self._prompt_prefix}USER QUERY: "{user_query}"
+
+Generate a PostgreSQL query that answers this question intelligently. Return ONLY the SQL query, no explanations or markdown formatting.
+"""
+
+        try:
+            # Generate SQL using Gemini
+            response = self.model.generate_content(prompt)
+            return self._sql_result(user_query, response.text)
+            
+        except Exception as e:
+            return {
+                "status": "error",
+                "error": str(e),
+                "user_query": user_query
+            }
+    
+    @staticmethod
+    def _sql_cache_key(user_query: str) -> str:
+        """Normalize a query so case and whitespace variants share generated SQL"""
+        return " ".join(user_query.lower().split())
+    
+    def _cached_sql(self, user_query: str) -> Optional[Dict[str, Any]]:
+        """Previously generated SQL for this query (flagged cache_hit), or None once expired"""
+        cache_key = self._sql_cache_key(user_query)
+        with self._sql_cache_lock:
+            entry = self._sql_cache.get(cache_key)
+            if entry is None:
+                return None
+            expires_at, result = entry
+            if time.monotonic() >= expires_at:
+                del self._sql_cache[cache_key]
+                return None
+            self._sql_cache.move_to_end(cache_key)
+        return dict(result, user_query=user_query, cache_hit=True)
+    
+    def _cache_sql(self, result: Dict[str, Any]):
+        """Remember safe generated SQL for repeats of the same query"""
+        if not result["validation"]["is_safe"]:
+            return
+        
+        cache_key = self._sql_cache_key(result["user_query"])
+        with self._sql_cache_lock:
+            self._sql_cache[cache_key] = (time.monotonic() + SQL_CACHE_TTL_SECONDS, dict(result))
+            self._sql_cache.move_to_end(cache_key)
+            if len(self._sql_cache) > SQL_CACHE_MAX_ENTRIES:
+                self._sql_cache.popitem(last=False)
+    
+    def _sql_prompt_context(self) -> str:
+        """Schema, rules and examples shared by the single and batch SQL prompts"""
+        return f"""You are an expert SQL query generator for oceanographic Argo float data. 
 
 {self.schema_info}
 
@@ -155,39 +336,82 @@ TEMPORAL QUERY EXAMPLES:
 - "data from January 2025" → WHERE datetime >= '2025-01-01' AND datetime < '2025-02-01'
 - "latest data" → ORDER BY datetime DESC LIMIT 50
 
-USER QUERY: "{user_query}"
-
-Generate a PostgreSQL query that answers this question intelligently. Return ONLY the SQL query, no explanations or markdown formatting.
 """
+    
+    def _sql_result(self, user_query: str, generated_sql: str) -> Dict[str, Any]:
+        """Clean up one generated SQL statement and wrap it with its validation"""
+        generated_sql = generated_sql.strip()
+        
+        # Clean up the response (remove any markdown formatting)
+        if generated_sql.startswith('```sql'):
+            generated_sql = generated_sql.replace('```sql', '').replace('```', '').strip()
+        elif generated_sql.startswith('```'):
+            generated_sql = generated_sql.replace('```', '').strip()
+        
+        # Validate the query
+        validation_result = self._validate_sql(generated_sql)
+        
+        result = {
+            "status": "success",
+            "sql": generated_sql,
+            "user_query": user_query,
+            "validation": validation_result,
+            "ai_model": "gemini-2.0-flash-exp"
+        }
+        self._cache_sql(result)
+        return result
+    
+    def generate_sql_queries(self, user_queries: List[str]) -> List[Dict[str, Any]]:
+        """
+        Generate SQL for several natural language queries with one Gemini call
+        
+        Args:
+            user_queries: Natural language queries from users
+            
+        Returns:
+            One generate_sql_query-style result per query, in order. Cached
+            SQL is reused; if the batch answer cannot be split back into one
+            query per input, each query is generated on its own instead.
+        """
+        # Only queries without cached SQL go to Gemini
+        results = [self._cached_sql(user_query) for user_query in user_queries]
+        pending = [i for i, result in enumerate(results) if result is None]
+        if len(pending) > 1:
+            for i, result in zip(pending, self._generate_sql_batch([user_queries[i] for i in pending])):
+                results[i] = result
+        else:
+            for i in pending:
+                results[i] = self.generate_sql_query(user_queries[i])
+        return results
+    
+    def _generate_sql_batch(self, user_queries: List[str]) -> List[Dict[str, Any]]:
+        """One Gemini call for several uncached queries, falling back to one call per query"""
+        numbered_queries = "\n".join(f'{i}. "{user_query}"' for i, user_query in enumerate(user_queries, 1))
+        prompt = f"""
+{self._prompt_prefix}USER QUERIES:
+{numbered_queries}
 
+Generate one PostgreSQL query for each user query above. Start each one with a line "-- QUERY <number>" using the user query's number, followed by the SQL. Return ONLY these blocks, no explanations or markdown formatting.
+"""
+        
         try:
-            # Generate SQL using Gemini
             response = self.model.generate_content(prompt)
-            generated_sql = response.text.strip()
-            
-            # Clean up the response (remove any markdown formatting)
-            if generated_sql.startswith('```sql'):
-                generated_sql = generated_sql.replace('```sql', '').replace('```', '').strip()
-            elif generated_sql.startswith('```'):
-                generated_sql = generated_sql.replace('```', '').strip()
-            
-            # Validate the query
-            validation_result = self._validate_sql(generated_sql)
-            
-            return {
-                "status": "success",
-                "sql": generated_sql,
-                "user_query": user_query,
-                "validation": validation_result,
-                "ai_model": "gemini-2.0-flash-exp"
-            }
+            # Fences may wrap the whole answer, so drop them before splitting
+            answer = response.text.replace('```sql', '').replace('```', '')
+            parts = BATCH_QUERY_MARKER.split(answer)
+            # parts = [preamble, number, sql, number, sql, ...]
+            sql_by_number = {int(number): sql for number, sql in zip(parts[1::2], parts[2::2])}
             
+            if sorted(sql_by_number) == list(range(1, len(user_queries) + 1)):
+                return [
+                    self._sql_result(user_query, sql_by_number[i].strip().rstrip(';'))
+                    for i, user_query in enumerate(user_queries, 1)
+                ]
+            print(f"⚠️ Batch SQL answer had {len(sql_by_number)} of {len(user_queries)} queries, generating one by one")
         except Exception as e:
-            return {
-                "status": "error",
-                "error": str(e),
-                "user_query": user_query
-            }
+            print(f"⚠️ Batch SQL generation failed ({e}), generating one by one")
+        
+        return [self.generate_sql_query(user_query) for user_query in user_queries]
     
     def _validate_sql(self, sql: str) -> Dict[str, Any]:
         """Validate generated SQL query"""
@@ -207,14 +431,10 @@ Generate a PostgreSQL query that answers this question intelligently. Return ONL
             validation["is_safe"] = False
             validation["warnings"].append("Query is not a SELECT statement")
         
-        # Check for dangerous keywords (as separate words, not substrings)
-        dangerous_keywords = ['drop', 'delete', 'truncate', 'insert', 'update', 'alter', 'create']
-        import re
-        for keyword in dangerous_keywords:
-            # Use word boundaries to avoid false positives like "created_at"
-            if re.search(r'\b' + keyword + r'\b', sql_lower):
-                validation["is_safe"] = False
-                validation["warnings"].append(f"Contains dangerous keyword: {keyword}")
+        # Check for dangerous keywords (as separate words, not substrings), one scan for all
+        for keyword in dict.fromkeys(DANGEROUS_SQL_RE.findall(sql_lower)):
+            validation["is_safe"] = False
+            validation["warnings"].append(f"Contains dangerous keyword: {keyword}")
         
         # Check for LIMIT clause
         if 'limit' in sql_lower:
@@ -227,15 +447,25 @@ Generate a PostgreSQL query that answers this question intelligently. Return ONL
     def execute_generated_query(self, sql: str) -> Dict[str, Any]:
         """Execute the generated SQL query"""
         try:
-            with psycopg2.connect(**self.db_config) as conn:
-                df = pd.read_sql(sql, conn)
+            with self._connection() as conn:
+                # Rows stream straight into the response (no DataFrame copy); withhold=True
+                # lets the named cursor live outside a transaction (autocommit)
+                cur = conn.cursor(name="gemini_stream", cursor_factory=RealDictCursor, withhold=True)
+                register_type(DECIMAL_AS_FLOAT, cur)
+                cur.itersize = CURSOR_FETCH_ROWS
+                # Executed before the with block: a failed DECLARE leaves no cursor to close,
+                # and closing it anyway would replace the real error
+                cur.execute(sql)
+                with cur:
+                    data = [dict(row) for row in cur]
+                    columns = [desc.name for desc in cur.description]
                 
                 return {
                     "status": "success",
                     "sql": sql,
-                    "row_count": len(df),
-                    "columns": list(df.columns),
-                    "data": df.to_dict(orient="records")
+                    "row_count": len(data),
+                    "columns": columns,
+                    "data": data
                 }
                 
         except Exception as e:
@@ -366,12 +596,17 @@ Provide your analysis:
         
         return summary
     
-    def query_and_execute(self, user_query: str) -> Dict[str, Any]:
-        """Complete workflow: generate SQL and execute it"""
+    def query_and_execute(self, user_query: str, sql_result: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Complete workflow: generate SQL and execute it
+        
+        sql_result may carry SQL already generated for this query (e.g. by
+        generate_sql_queries), in which case step 1 is skipped.
+        """
         print(f"🧠 Processing query: '{user_query}'")
         
         # Step 1: Generate SQL
-        sql_result = self.generate_sql_query(user_query)
+        if sql_result is None:
+            sql_result = self.generate_sql_query(user_query)
         
         if sql_result["status"] != "success":
             return sql_result
@@ -445,12 +680,17 @@ def demo_gemini_sql_generator():
         "Find the most recent 10 profiles"
     ]
     
-    for i, query in enumerate(test_queries, 1):
+    # SQL for every query comes from one batched Gemini call; executing and
+    # analysing them (DB + one Gemini call each) is I/O-bound, so run them all
+    # at once. map keeps results in query order for the report below
+    sql_results = generator.generate_sql_queries(test_queries)
+    with ThreadPoolExecutor(max_workers=len(test_queries)) as executor:
+        results = list(executor.map(generator.query_and_execute, test_queries, sql_results))
+    
+    for i, (query, result) in enumerate(zip(test_queries, results), 1):
         print(f"\n🔍 Test Query {i}: '{query}'")
         print("-" * 40)
         
-        result = generator.query_and_execute(query)
-        
         print(f"Status: {result['status']}")
         
         if result["status"] == "success":
@@ -154,6 +154,7 @@ class ArgoDataProcessor:
             
             # Float-specific queries
             "CREATE INDEX IF NOT EXISTS idx_profiles_cycle ON argo_profiles(cycle_number);",
+            "CREATE INDEX IF NOT EXISTS idx_profiles_float_datetime ON argo_profiles(float_id, datetime DESC);",
             
             # Composite indexes for common query patterns
             "CREATE INDEX IF NOT EXISTS idx_measurements_location_pressure ON argo_measurements(latitude, longitude, pressure);",
@@ -254,6 +255,21 @@ class ArgoDataProcessor:
             conn.close()
         LOG.info(f"Inserted {len(measurements_df)} measurement records into argo_measurements")
 
+    def refresh_latest_profiles(self):
+        """Refresh the argo_latest_profiles materialized view, if setup created it."""
+        conn = self._connect()
+        try:
+            with conn:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT to_regclass('argo_latest_profiles') IS NOT NULL")
+                    if not cur.fetchone()[0]:
+                        return
+                    # CONCURRENTLY keeps the view readable while it is rebuilt
+                    cur.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY argo_latest_profiles")
+        finally:
+            conn.close()
+        LOG.info("Refreshed materialized view argo_latest_profiles")
+
 
 class HistoricalArgoDownloader:
     def __init__(self, config: Dict[str, Any], db_config: Dict[str, Any]):
@@ -432,6 +448,13 @@ class HistoricalArgoDownloader:
                 # pass only the filename to NetCDFProcessor.process_single_file
                 self.process_file(f["filename"])
 
+        # One refresh for the whole run rather than one per file
+        if self.stats["processed_files"]:
+            try:
+                self.data_processor.refresh_latest_profiles()
+            except Exception as e:
+                LOG.warning(f"Failed to refresh argo_latest_profiles: {e}")
+
         # Summary
         LOG.info("===== INGEST SUMMARY =====")
         LOG.info(json.dumps(self.stats, indent=2))
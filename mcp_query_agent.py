@@ -9,8 +9,7 @@ from pathlib import Path
 # Add paths
 sys.path.insert(0, str(Path(__file__).parent))
 
-from float_chat_mcp.data_access_tools.data_access_orchestrator import DataAccessOrchestrator
-from float_chat_mcp.data_access_tools.redis_cache_manager import RedisCacheManager
+from float_chat_mcp._singletons import get_orchestrator, get_cache_manager
 
 
 class MCPQueryAgent:
@@ -18,8 +17,8 @@ class MCPQueryAgent:
     
     def __init__(self):
         """Initialize MCP tools"""
-        self.orchestrator = DataAccessOrchestrator(use_gemini=True, enable_cache=True)
-        self.cache_manager = RedisCacheManager(enabled=True)
+        self.orchestrator = get_orchestrator()
+        self.cache_manager = get_cache_manager()
         
         # Keywords that indicate data queries
         self.data_keywords = [
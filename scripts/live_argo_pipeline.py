@@ -402,6 +402,19 @@ class LiveArgoAutomation:
             
             conn.commit()
             
+            # Refresh the latest-position view behind the map endpoints (if setup created it);
+            # CONCURRENTLY keeps it readable while the refresh runs. The rows are already
+            # committed, so a failed refresh is only a warning
+            try:
+                cursor.execute("SELECT to_regclass('argo_latest_profiles') IS NOT NULL;")
+                if cursor.fetchone()[0]:
+                    self.logger.info("🗺️ Refreshing argo_latest_profiles...")
+                    cursor.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY argo_latest_profiles;")
+                    conn.commit()
+            except Exception as e:
+                conn.rollback()
+                self.logger.warning(f"Failed to refresh argo_latest_profiles: {e}")
+            
             # Get updated counts
             cursor.execute("SELECT COUNT(*) FROM argo_profiles;")
             total_profiles = cursor.fetchone()[0]
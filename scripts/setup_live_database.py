@@ -155,6 +155,7 @@ def create_live_indexes():
         # Float-specific queries
         "CREATE INDEX IF NOT EXISTS idx_live_profiles_float_id ON argo_profiles(float_id);",
         "CREATE INDEX IF NOT EXISTS idx_live_profiles_cycle ON argo_profiles(cycle_number);",
+        "CREATE INDEX IF NOT EXISTS idx_live_profiles_float_datetime ON argo_profiles(float_id, datetime DESC);",
         
         # Composite indexes for common query patterns
         "CREATE INDEX IF NOT EXISTS idx_live_measurements_location_pressure ON argo_measurements(latitude, longitude, pressure);",
@@ -8,6 +8,7 @@ import pandas as pd
 import os
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
 from dotenv import load_dotenv
+from float_location_service import LATEST_PROFILES_VIEW, LATEST_PROFILES_QUERY
 
 # Load environment variables
 load_dotenv()
@@ -135,6 +136,13 @@ def create_indexes():
         # Float-specific queries
         "CREATE INDEX IF NOT EXISTS idx_profiles_float_id ON argo_profiles(float_id);",
         "CREATE INDEX IF NOT EXISTS idx_profiles_cycle ON argo_profiles(cycle_number);",
+        "CREATE INDEX IF NOT EXISTS idx_profiles_float_datetime ON argo_profiles(float_id, datetime DESC);",
+        
+        # Latest position per float (DISTINCT ON float_id ... datetime DESC): partial and covering,
+        # so the location queries read it in order with an index-only scan instead of sorting
+        "CREATE INDEX IF NOT EXISTS idx_profiles_latest_position ON argo_profiles(float_id, datetime DESC) "
+        "INCLUDE (latitude, longitude, global_profile_id, cycle_number, measurement_count) "
+        "WHERE latitude IS NOT NULL AND longitude IS NOT NULL;",
         
         # Composite indexes for common query patterns
         "CREATE INDEX IF NOT EXISTS idx_measurements_location_pressure ON argo_measurements(latitude, longitude, pressure);",
@@ -161,6 +169,78 @@ def create_indexes():
     
     return True
 
+def create_spatial_index():
+    """Add an indexed PostGIS geography column for radius queries (optional)"""
+    
+    spatial_sql = [
+        "CREATE EXTENSION IF NOT EXISTS postgis;",
+        
+        # Kept in sync with latitude/longitude by Postgres itself
+        """ALTER TABLE argo_profiles ADD COLUMN IF NOT EXISTS geom geography(Point, 4326)
+        GENERATED ALWAYS AS (ST_MakePoint(longitude::float8, latitude::float8)::geography) STORED;""",
+        
+        "CREATE INDEX IF NOT EXISTS idx_profiles_geom ON argo_profiles USING GIST (geom);"
+    ]
+    
+    try:
+        conn = psycopg2.connect(**DB_CONFIG)
+        cursor = conn.cursor()
+        
+        for spatial_statement in spatial_sql:
+            cursor.execute(spatial_statement)
+        
+        conn.commit()
+        print("Created index: profiles_geom (PostGIS)")
+        
+        cursor.close()
+        conn.close()
+        
+    except Exception as e:
+        # Radius queries fall back to a bounding box plus Haversine filtering
+        print(f"PostGIS spatial index skipped: {e}")
+    
+    return True
+
+def create_latest_profiles_view():
+    """Materialize the latest position of each float (rebuilt on every setup)"""
+    
+    try:
+        conn = psycopg2.connect(**DB_CONFIG)
+        cursor = conn.cursor()
+        
+        # Carry the PostGIS geom column over when create_spatial_index added it
+        cursor.execute("""
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'argo_profiles' AND column_name = 'geom'
+        """)
+        has_geom = cursor.fetchone() is not None
+        extra_columns = ",\n        geom" if has_geom else ""
+        
+        cursor.execute(f"DROP MATERIALIZED VIEW IF EXISTS {LATEST_PROFILES_VIEW};")
+        cursor.execute(
+            f"CREATE MATERIALIZED VIEW {LATEST_PROFILES_VIEW} AS "
+            + LATEST_PROFILES_QUERY.format(extra_columns=extra_columns)
+        )
+        
+        # The unique index is what allows REFRESH ... CONCURRENTLY from the ingest scripts
+        cursor.execute(f"CREATE UNIQUE INDEX idx_latest_profiles_float ON {LATEST_PROFILES_VIEW} (float_id);")
+        # Range scans for the bounding-box prefilter of the non-PostGIS radius queries
+        cursor.execute(f"CREATE INDEX idx_latest_profiles_location ON {LATEST_PROFILES_VIEW} (latitude, longitude);")
+        if has_geom:
+            cursor.execute(f"CREATE INDEX idx_latest_profiles_geom ON {LATEST_PROFILES_VIEW} USING GIST (geom);")
+        
+        conn.commit()
+        print(f"Created materialized view: {LATEST_PROFILES_VIEW}")
+        
+        cursor.close()
+        conn.close()
+        
+    except Exception as e:
+        # FloatLocationService computes the latest profiles inline without it
+        print(f"Latest profiles view skipped: {e}")
+    
+    return True
+
 def import_csv_data(csv_dir="./processed_data/"):
     """Import CSV data into PostgreSQL tables"""
     
@@ -278,6 +358,12 @@ def main():
     if not create_indexes():
         return
     
+    # Step 4b: PostGIS radius index (skipped if the extension is unavailable)
+    create_spatial_index()
+    
+    # Step 4c: Latest position per float (refreshed by the ingest scripts)
+    create_latest_profiles_view()
+    
     # Step 5: Test database
     if not test_database():
         return